@@ -0,0 +1,237 @@
+# python standard library
+from datetime import datetime
+import queue
+import time
+
+# from pypi
+import RFExplorer
+from RFExplorer.RFESweepData import RFESweepData
+
+# this folder
+from telemetry import Telemetry, message_size
+from timing import Timings
+
+class SweepQueue(queue.Queue):
+    """A Queue that you can wait on without taking anything off of it
+
+    Args:
+     telemetry (:py:class:`telemetry.Telemetry`|None): counters to update (None means make new ones)
+     is_holding (callable|None): function that returns True if sweeps are being dropped
+    """
+    def __init__(self, telemetry=None, is_holding=None):
+        queue.Queue.__init__(self)
+        self.telemetry = Telemetry() if telemetry is None else telemetry
+        self.is_holding = is_holding
+        return
+
+    def _put(self, item):
+        """Adds the item and wakes up everything waiting on the queue
+    
+        Args:
+         item: the thing to add to the queue
+        """
+        queue.Queue._put(self, item)
+        self.not_empty.notify_all()
+        telemetry = self.telemetry
+        telemetry.count("messages")
+        telemetry.count("bytes", message_size(item))
+        if isinstance(item, RFESweepData):
+            telemetry.count("sweeps_received")
+        elif isinstance(item, str) and item.startswith(("$S", "Ignored $S")):
+            telemetry.count("parse_errors")
+        telemetry.gauge("queue_depth", self._qsize())
+        return
+
+    def _get(self):
+        """Takes the next item off the queue and counts it
+    
+        Returns:
+         the item
+        """
+        item = queue.Queue._get(self)
+        if isinstance(item, RFESweepData):
+            self.telemetry.count("sweeps_processed")
+            if self.is_holding is not None and self.is_holding():
+                self.telemetry.count("sweeps_dropped")
+        self.telemetry.gauge("queue_depth", self._qsize())
+        return item
+
+    def wait(self, timeout=None):
+        """Waits until there is something on the queue
+    
+        Args:
+         timeout (float|None): seconds to wait (None means wait forever)
+    
+        Returns:
+         bool: True if there is something on the queue
+        """
+        with self.not_empty:
+            if not self._qsize():
+                self.not_empty.wait(timeout)
+            return self._qsize() > 0
+
+class Acquisition(object):
+    """Waits for data from the RF Explorer without spinning
+
+    Args:
+     rf_explorer (:py:class:`RFExplorer.RFECommunicator`): communicator to wait on
+    """
+    def __init__(self, rf_explorer):
+        self.rf_explorer = rf_explorer
+        self.queue = self.install_queue()
+        self.telemetry = self.queue.telemetry
+        self.timings = Timings()
+        self._count = 0
+        self._last_sweep = None
+        return
+
+    def install_queue(self):
+        """Replaces the RFECommunicator's queue with a SweepQueue
+    
+        Returns:
+         SweepQueue: the queue the receive-thread now uses
+        """
+        if isinstance(self.rf_explorer.m_objQueue, SweepQueue):
+            return self.rf_explorer.m_objQueue
+        sweep_queue = SweepQueue(
+            is_holding=lambda: self.rf_explorer.HoldMode)
+        with self.rf_explorer.m_hQueueLock:
+            old_queue = self.rf_explorer.m_objQueue
+            while not old_queue.empty():
+                sweep_queue.put(old_queue.get_nowait())
+            self.rf_explorer.m_objQueue = sweep_queue
+            self.rf_explorer.m_objThread.m_objQueue = sweep_queue
+        return sweep_queue
+
+    def wait_for(self, predicate, timeout=None):
+        """Processes received data until the predicate is True
+    
+        Args:
+         predicate (callable): function that returns True when we're done waiting
+         timeout (float|None): seconds to wait (None means wait forever)
+    
+        Returns:
+         bool: True if the predicate became True, False if we timed out
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.rf_explorer.ProcessReceivedString(True)
+            if predicate():
+                return True
+            remaining = None
+            if end is not None:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return False
+            self.queue.wait(remaining)
+
+    def wait_for_reset(self, timeout=None):
+        """Waits for the RF Explorer to report that it reset
+    
+        Args:
+         timeout (float|None): seconds to wait (None means wait forever)
+    
+        Returns:
+         bool: True if the reset was seen
+        """
+        return self.wait_for(lambda: self.rf_explorer.IsResetEvent, timeout)
+
+    def wait_for_quiet(self, quiet, timeout=None):
+        """Waits until nothing has been received for a while
+    
+        Args:
+         quiet (float): seconds without receiving anything
+         timeout (float|None): most seconds to wait (None means wait forever)
+    
+        Returns:
+         bool: True if it went quiet, False if we timed out
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.rf_explorer.ProcessReceivedString(True)
+            wait = quiet
+            if end is not None:
+                remaining = end - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(quiet, remaining)
+            if not self.queue.wait(wait):
+                return wait == quiet
+
+    def wait_for_model(self, timeout=None):
+        """Waits for the RF Explorer's model to be set
+    
+        Args:
+         timeout (float|None): seconds to wait (None means wait forever)
+    
+        Returns:
+         bool: True if the model was set
+        """
+        return self.wait_for(
+            lambda: (self.rf_explorer.ActiveModel
+                     != RFExplorer.RFE_Common.eModel.MODEL_NONE),
+            timeout)
+
+    def wait_for_sweep(self, last_count=0, timeout=None):
+        """Waits for a new sweep to be added to the SweepData
+    
+        Args:
+         last_count (int): the SweepData.Count the last time you checked
+         timeout (float|None): seconds to wait (None means wait forever)
+    
+        Returns:
+         bool: True if there is a new sweep
+        """
+        def new_sweep():
+            nonlocal last_count
+            count = self.rf_explorer.SweepData.Count
+            last_count = min(last_count, count)
+            return count > last_count
+        return self.wait_for(new_sweep, timeout)
+
+    def new_sweeps(self, timeout=None):
+        """Waits for and then gets the sweeps that came in since the last call
+    
+        Args:
+         timeout (float|None): seconds to wait (None means wait forever)
+    
+        Returns:
+         list: the new sweeps (empty if it timed out)
+        """
+        if not self.wait_for_sweep(self._count, timeout):
+            return []
+        collection = self.rf_explorer.SweepData
+        count = collection.Count
+        if (self._count > count
+                or (self._count and collection.GetData(self._count - 1)
+                    is not self._last_sweep)):
+            self._count = 0
+        sweeps = [collection.GetData(index) for index in range(self._count, count)]
+        if self._last_sweep is not None:
+            previous = self._last_sweep.CaptureTime
+            for sweep in sweeps:
+                self.timings.record("sweep",
+                                    (sweep.CaptureTime - previous).total_seconds())
+                previous = sweep.CaptureTime
+        self._last_sweep = sweeps[-1]
+        self._count = count
+        self.telemetry.count("sweeps_delivered", len(sweeps))
+        self.telemetry.gauge(
+            "lag", (datetime.now() - sweeps[0].CaptureTime).total_seconds())
+        if collection.IsFull():
+            self.telemetry.count("buffer_full")
+            collection.CleanAll()
+            self.rf_explorer.HoldMode = False
+            self._count = 0
+        return sweeps
+
+    def latest_sweep(self):
+        """Gets the most recent sweep
+    
+        Returns:
+         :py:class:`RFExplorer.RFESweepData.RFESweepData`: latest sweep or None
+        """
+        count = self.rf_explorer.SweepData.Count
+        if count == 0:
+            return None
+        return self.rf_explorer.SweepData.GetData(count - 1)
@@ -0,0 +1,442 @@
+# python standard library
+from collections import namedtuple
+import json
+import os
+
+# from pypi
+import numpy
+
+# this folder
+from capture_file import CaptureReader, CaptureWriter
+from sweep_arrays import frequency_steps
+
+INDEX_NAME = "index.json"
+CHUNK_NAME = "chunk-{:06d}"
+CAPTURE_EXTENSION = ".rfecap"
+SUMMARY_EXTENSION = ".npz"
+CHUNK_SECONDS = 3600
+TOLERANCE = 0.001
+
+Chunk = namedtuple("Chunk", ["name", "first", "last", "count", "start_frequency",
+                             "step_frequency", "steps", "maximum"])
+
+ArchivePeak = namedtuple("ArchivePeak", ["capture_time", "frequency", "amplitude"])
+
+def to_datetime64(moment):
+    """Converts a time to a datetime64 with microseconds
+
+    Args:
+     moment (datetime.datetime|numpy.datetime64|str|None): the time
+
+    Returns:
+     numpy.datetime64|None: the time (None if there wasn't one)
+    """
+    if moment is None:
+        return None
+    return numpy.datetime64(moment, "us")
+
+def load_index(directory):
+    """Reads the archive's index
+
+    Args:
+     directory (str): the archive's folder
+
+    Returns:
+     list: the :py:class:`Chunk` entries (empty if there's no index)
+    """
+    path = os.path.join(directory, INDEX_NAME)
+    if not os.path.isfile(path):
+        return []
+    with open(path) as reader:
+        entries = json.load(reader)
+    return [Chunk(entry["name"], to_datetime64(entry["first"]),
+                  to_datetime64(entry["last"]), entry["count"],
+                  entry["start_frequency"], entry["step_frequency"],
+                  entry["steps"], entry["maximum"])
+            for entry in entries]
+
+def save_index(directory, chunks):
+    """Replaces the archive's index
+
+    Args:
+     directory (str): the archive's folder
+     chunks (list): the :py:class:`Chunk` entries
+    """
+    entries = [dict(chunk._asdict(), first=str(chunk.first), last=str(chunk.last))
+               for chunk in chunks]
+    path = os.path.join(directory, INDEX_NAME)
+    temporary = path + ".tmp"
+    with open(temporary, "w") as writer:
+        json.dump(entries, writer, indent=1)
+    os.replace(temporary, path)
+    return
+
+def save_summary(path, maximum, rows):
+    """Replaces a chunk's summary file
+
+    Args:
+     path (str): the summary file
+     maximum (numpy.ndarray): largest amplitude at each step
+     rows (numpy.ndarray): the sweep each maximum came from
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as writer:
+        numpy.savez(writer, maximum=maximum, rows=rows)
+    os.replace(temporary, path)
+    return
+
+def capture_names(directory):
+    """Finds the chunks that have capture files
+
+    Args:
+     directory (str): the archive's folder
+
+    Returns:
+     list: the chunk names (without the extension) in sorted order
+    """
+    return sorted(name[:-len(CAPTURE_EXTENSION)] for name in os.listdir(directory)
+                  if name.endswith(CAPTURE_EXTENSION))
+
+def chunk_number(name):
+    """Gets the number at the end of a chunk's name
+
+    Args:
+     name (str): the chunk's name
+
+    Returns:
+     int: the chunk's number (0 if the name doesn't end with one)
+    """
+    number = name.rsplit("-", 1)[-1]
+    return int(number) if number.isdigit() else 0
+
+class ArchiveWriter(object):
+    """Writes sweeps into an archive of chunked capture files
+
+    Args:
+     directory (str): the archive's folder (created if it doesn't exist)
+     chunk_seconds (float): seconds of sweeps in each chunk
+     amplitude_type (str): 'float32' or 'uint8'
+    """
+    def __init__(self, directory, chunk_seconds=CHUNK_SECONDS,
+                 amplitude_type="uint8"):
+        self.directory = directory
+        self.chunk_seconds = chunk_seconds
+        self.amplitude_type = amplitude_type
+        os.makedirs(directory, exist_ok=True)
+        self.chunks = load_index(directory)
+        names = capture_names(directory)
+        indexed = set(chunk.name for chunk in self.chunks)
+        if any(name not in indexed for name in names):
+            self.chunks = rebuild(directory)
+        self.last_number = max([chunk_number(name) for name in names], default=0)
+        self.chunk = None
+        self._writer = None
+        self._maximum = None
+        self._rows = None
+        self._end = None
+        return
+
+    def __enter__(self):
+        """returns this object"""
+        return self
+    
+    def __exit__(self, type, value, traceback):
+        """closes the current chunk"""
+        self.close()
+        return
+
+    def open_chunk(self, sweep):
+        """Finishes the current chunk and starts a new one
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the first sweep for the chunk
+        """
+        self.close()
+        self.last_number += 1
+        name = CHUNK_NAME.format(self.last_number)
+        self._writer = CaptureWriter(
+            os.path.join(self.directory, name + CAPTURE_EXTENSION),
+            self.amplitude_type)
+        self._writer.open(sweep)
+        capture_time = to_datetime64(sweep.CaptureTime)
+        self.chunk = Chunk(name, capture_time, capture_time, 0,
+                           sweep.StartFrequencyMHZ, sweep.StepFrequencyMHZ,
+                           sweep.TotalSteps, None)
+        self._maximum = numpy.full(sweep.TotalSteps, -numpy.inf, dtype=numpy.float32)
+        self._rows = numpy.zeros(sweep.TotalSteps, dtype=numpy.uint32)
+        self._end = capture_time + numpy.timedelta64(int(self.chunk_seconds * 10**6), "us")
+        return
+
+    def is_new_chunk(self, sweep):
+        """Checks if the sweep has to go in a new chunk
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the next sweep
+    
+        Returns:
+         bool: True if there's no chunk, the configuration changed or the chunk is done
+        """
+        return (self._writer is None
+                or not self._writer.header.matches(sweep)
+                or to_datetime64(sweep.CaptureTime) >= self._end)
+
+    def write(self, sweeps):
+        """Adds the sweeps to the archive
+    
+        Args:
+         sweeps (list): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects in capture order
+    
+        Returns:
+         int: the number of sweeps written
+        """
+        sweeps = list(sweeps)
+        start = 0
+        while start < len(sweeps):
+            if self.is_new_chunk(sweeps[start]):
+                self.open_chunk(sweeps[start])
+            stop = start + 1
+            while stop < len(sweeps) and not self.is_new_chunk(sweeps[stop]):
+                stop += 1
+            self._writer.write(sweeps[start:stop])
+            self.update_summary(sweeps[start:stop])
+            start = stop
+        return len(sweeps)
+
+    def update_summary(self, sweeps):
+        """Adds a run of sweeps to the current chunk's summary
+    
+        Args:
+         sweeps (list): the sweeps that were just written to the current chunk
+        """
+        steps = self.chunk.steps
+        amplitudes = numpy.array([sweep.m_arrAmplitude[:steps] for sweep in sweeps],
+                                 dtype=numpy.float32).reshape(len(sweeps), steps)
+        if self.amplitude_type == "uint8":
+            amplitudes = numpy.clip(numpy.rint(amplitudes * -2), 0, 255) / -2
+        best = amplitudes.argmax(axis=0)
+        best_amplitude = amplitudes[best, numpy.arange(steps)]
+        better = best_amplitude > self._maximum
+        self._maximum[better] = best_amplitude[better]
+        self._rows[better] = best[better] + self.chunk.count
+        self.chunk = self.chunk._replace(
+            last=to_datetime64(sweeps[-1].CaptureTime),
+            count=self.chunk.count + len(sweeps),
+            maximum=float(self._maximum.max()))
+        return
+
+    def flush(self):
+        """Saves the current chunk's sweeps, summary and index entry"""
+        if self._writer is None or not self.chunk.count:
+            return
+        self._writer.flush()
+        save_summary(os.path.join(self.directory, self.chunk.name + SUMMARY_EXTENSION),
+                     self._maximum, self._rows)
+        if self.chunks and self.chunks[-1].name == self.chunk.name:
+            self.chunks[-1] = self.chunk
+        else:
+            self.chunks.append(self.chunk)
+        save_index(self.directory, self.chunks)
+        return
+
+    def close(self):
+        """Finishes the current chunk"""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        return
+
+class Archive(object):
+    """Queries an archive of chunked capture files
+
+    Args:
+     directory (str): the archive's folder
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.chunks_read = 0
+        return
+
+    @property
+    def chunks(self):
+        """The chunks in the archive
+    
+        Returns:
+         list: :py:class:`Chunk` entries from the index (oldest first)
+        """
+        return load_index(self.directory)
+
+    def select(self, start=None, stop=None, low=None, high=None):
+        """Finds the chunks that overlap the times and frequencies
+    
+        Args:
+         start (datetime.datetime|None): earliest capture-time
+         stop (datetime.datetime|None): latest capture-time
+         low (float|None): lowest frequency (MHz)
+         high (float|None): highest frequency (MHz)
+    
+        Returns:
+         list: the :py:class:`Chunk` entries that overlap
+        """
+        start, stop = to_datetime64(start), to_datetime64(stop)
+        selected = []
+        for chunk in self.chunks:
+            top = chunk.start_frequency + chunk.step_frequency * (chunk.steps - 1)
+            if ((start is not None and chunk.last < start)
+                    or (stop is not None and chunk.first > stop)
+                    or (low is not None and top < low - TOLERANCE)
+                    or (high is not None and chunk.start_frequency > high + TOLERANCE)):
+                continue
+            selected.append(chunk)
+        return selected
+
+    def columns(self, chunk, low=None, high=None):
+        """Finds the steps in a chunk that are in the frequency range
+    
+        Args:
+         chunk (Chunk): the chunk
+         low (float|None): lowest frequency (MHz)
+         high (float|None): highest frequency (MHz)
+    
+        Returns:
+         slice: the steps in the range
+        """
+        frequency = frequency_steps(chunk.start_frequency, chunk.step_frequency,
+                                    chunk.steps)
+        first = 0 if low is None else int(numpy.searchsorted(frequency, low - TOLERANCE))
+        last = (chunk.steps if high is None
+                else int(numpy.searchsorted(frequency, high + TOLERANCE, side="right")))
+        return slice(first, last)
+
+    def summary(self, chunk):
+        """Loads a chunk's max-hold summary
+    
+        Args:
+         chunk (Chunk): the chunk
+    
+        Returns:
+         tuple: the maximum amplitude at each step and the row it came from
+        """
+        path = os.path.join(self.directory, chunk.name + SUMMARY_EXTENSION)
+        with numpy.load(path) as summary:
+            return summary["maximum"], summary["rows"]
+
+    def read(self, chunk, start=None, stop=None, low=None, high=None):
+        """Reads the sweeps in a chunk that are in the ranges
+    
+        Args:
+         chunk (Chunk): the chunk to read
+         start (datetime.datetime|None): earliest capture-time
+         stop (datetime.datetime|None): latest capture-time
+         low (float|None): lowest frequency (MHz)
+         high (float|None): highest frequency (MHz)
+    
+        Returns:
+         tuple: capture-times, frequencies (MHz) and (sweeps x steps) amplitudes (dBm)
+        """
+        start, stop = to_datetime64(start), to_datetime64(stop)
+        reader = CaptureReader(os.path.join(self.directory,
+                                            chunk.name + CAPTURE_EXTENSION))
+        self.chunks_read += 1
+        times = reader.capture_times[:chunk.count]
+        first = 0 if start is None else int(numpy.searchsorted(times, start))
+        last = (len(times) if stop is None
+                else int(numpy.searchsorted(times, stop, side="right")))
+        columns = self.columns(chunk, low, high)
+        amplitudes = reader.amplitudes(first, last)[:, columns]
+        return (numpy.array(times[first:last]), reader.frequencies[columns],
+                numpy.array(amplitudes, dtype=numpy.float32))
+
+    def query(self, start=None, stop=None, low=None, high=None):
+        """Reads the sweeps in the ranges, one chunk at a time
+    
+        Args:
+         start (datetime.datetime|None): earliest capture-time
+         stop (datetime.datetime|None): latest capture-time
+         low (float|None): lowest frequency (MHz)
+         high (float|None): highest frequency (MHz)
+    
+        Yields:
+         tuple: capture-times, frequencies and amplitudes for each chunk with sweeps in the ranges
+        """
+        for chunk in self.select(start, stop, low, high):
+            times, frequencies, amplitudes = self.read(chunk, start, stop, low, high)
+            if amplitudes.size:
+                yield times, frequencies, amplitudes
+        return
+
+    def peak(self, start=None, stop=None, low=None, high=None):
+        """Finds the strongest signal in the ranges
+    
+        Args:
+         start (datetime.datetime|None): earliest capture-time
+         stop (datetime.datetime|None): latest capture-time
+         low (float|None): lowest frequency (MHz)
+         high (float|None): highest frequency (MHz)
+    
+        Returns:
+         ArchivePeak|None: time, frequency and amplitude of the peak (None if nothing matched)
+        """
+        start64, stop64 = to_datetime64(start), to_datetime64(stop)
+        candidates = []
+        for chunk in self.select(start, stop, low, high):
+            columns = self.columns(chunk, low, high)
+            if columns.stop <= columns.start:
+                continue
+            maximum, rows = self.summary(chunk)
+            candidates.append((float(maximum[columns].max()), chunk, columns,
+                               maximum, rows))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+    
+        best = None
+        for bound, chunk, columns, maximum, rows in candidates:
+            if best is not None and bound <= best.amplitude:
+                break
+            frequency = frequency_steps(chunk.start_frequency, chunk.step_frequency,
+                                        chunk.steps)
+            inside = ((start64 is None or chunk.first >= start64)
+                      and (stop64 is None or chunk.last <= stop64))
+            if inside:
+                step = columns.start + int(maximum[columns].argmax())
+                reader = CaptureReader(os.path.join(self.directory,
+                                                    chunk.name + CAPTURE_EXTENSION))
+                peak = ArchivePeak(reader.capture_times[rows[step]],
+                                   float(frequency[step]), float(maximum[step]))
+            else:
+                times, frequencies, amplitudes = self.read(chunk, start, stop,
+                                                           low, high)
+                if not amplitudes.size:
+                    continue
+                row, column = numpy.unravel_index(amplitudes.argmax(), amplitudes.shape)
+                peak = ArchivePeak(times[row], float(frequencies[column]),
+                                   float(amplitudes[row, column]))
+            if best is None or peak.amplitude > best.amplitude:
+                best = peak
+        return best
+
+def rebuild(directory):
+    """Rebuilds the index and summaries from the chunks' capture files
+
+    Args:
+     directory (str): the archive's folder
+
+    Returns:
+     list: the new :py:class:`Chunk` entries
+    """
+    chunks = []
+    for name in capture_names(directory):
+        reader = CaptureReader(os.path.join(directory, name + CAPTURE_EXTENSION))
+        if not len(reader):
+            continue
+        amplitudes = reader.amplitudes()
+        rows = amplitudes.argmax(axis=0).astype(numpy.uint32)
+        maximum = amplitudes.max(axis=0).astype(numpy.float32)
+        save_summary(os.path.join(directory, name + SUMMARY_EXTENSION),
+                     maximum, rows)
+        header = reader.header
+        chunks.append(Chunk(name, reader.capture_times[0], reader.capture_times[-1],
+                            len(reader), header.start_frequency,
+                            header.step_frequency, header.steps,
+                            float(maximum.max())))
+    save_index(directory, chunks)
+    return chunks
@@ -0,0 +1,211 @@
+# python standard library
+from collections import deque
+import asyncio
+import threading
+
+# this folder
+from example_1 import Communicator
+
+class Subscription(object):
+    """A bounded buffer of sweeps for one consumer
+
+    Args:
+     maxsize (int): the most sweeps to hold before dropping the oldest
+    """
+    def __init__(self, maxsize=16):
+        self.sweeps = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self.ready = asyncio.Event()
+        return
+
+    def put(self, sweep):
+        """Adds the sweep, dropping the oldest one if the buffer is full
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the new sweep
+        """
+        if len(self.sweeps) == self.sweeps.maxlen:
+            self.dropped += 1
+        self.sweeps.append(sweep)
+        self.ready.set()
+        return
+
+    def close(self):
+        """Marks the subscription as finished"""
+        self.closed = True
+        self.ready.set()
+        return
+
+    async def get(self):
+        """Gets the oldest sweep in the buffer
+    
+        Returns:
+         :py:class:`RFExplorer.RFESweepData.RFESweepData`: the next sweep
+    
+        Raises:
+         StopAsyncIteration: the subscription is closed and the buffer is empty
+        """
+        while not self.sweeps:
+            if self.closed:
+                raise StopAsyncIteration
+            self.ready.clear()
+            await self.ready.wait()
+        return self.sweeps.popleft()
+
+    def __aiter__(self):
+        """returns this object"""
+        return self
+    
+    async def __anext__(self):
+        """Gets the next sweep
+    
+        Returns:
+         :py:class:`RFExplorer.RFESweepData.RFESweepData`: the next sweep
+        """
+        return await self.get()
+
+class AsyncCommunicator(object):
+    """An asyncio wrapper around the Communicator
+
+    Args:
+     serial_port (string|None): the name of the USB file
+     baud_rate (int): the signaling rate for the serial connection
+     settle_time (float): Seconds to wait after resetting
+     timeout (float|None): Seconds to wait for the device (None means forever)
+     executor (:py:class:`concurrent.futures.Executor`|None): runs the blocking calls
+     poll_interval (float): Seconds the reader waits before checking if it should stop
+     adaptive_settle (bool): Stop settling once the device goes quiet after resetting
+     warm_start (bool): Skip the reset if the device matches the session cache
+     fast_parser (bool): Decode the sweeps in bulk instead of with the RFExplorer parser
+    """
+    def __init__(self, serial_port=None, baud_rate=500000, settle_time=3,
+                 timeout=None, executor=None, poll_interval=0.5,
+                 adaptive_settle=False, warm_start=False, fast_parser=False):
+        self.communicator = Communicator(serial_port, baud_rate,
+                                         settle_time=settle_time,
+                                         timeout=timeout,
+                                         adaptive_settle=adaptive_settle,
+                                         warm_start=warm_start,
+                                         fast_parser=fast_parser)
+        self.executor = executor
+        self.poll_interval = poll_interval
+        self.subscriptions = set()
+        self._stop = threading.Event()
+        self._reader = None
+        return
+
+    @property
+    def rf_explorer(self):
+        """The RFE Communicator
+    
+        Returns:
+         :py:class:`RFExplorer.RFECommunicator`: the communicator
+        """
+        return self.communicator.rf_explorer
+
+    async def __aenter__(self):
+        """returns this object"""
+        return self
+    
+    async def __aexit__(self, type, value, traceback):
+        """closes the communicator"""
+        await self.close()
+        return
+
+    async def set_up(self):
+        """Sets up the communicator and starts reading sweeps"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.communicator.set_up)
+        self._stop.clear()
+        self._reader = loop.run_in_executor(self.executor, self.read, loop)
+        self._reader.add_done_callback(self.close_subscriptions)
+        return
+
+    def read(self, loop):
+        """Reads sweeps until told to stop (runs in the executor)
+    
+        Args:
+         loop (:py:class:`asyncio.AbstractEventLoop`): loop to hand the sweeps to
+        """
+        acquisition = self.communicator.acquisition
+        while not self._stop.is_set():
+            sweeps = acquisition.new_sweeps(self.poll_interval)
+            if sweeps:
+                loop.call_soon_threadsafe(self.publish, sweeps)
+        return
+
+    def publish(self, sweeps):
+        """Adds the sweeps to every subscription
+    
+        Args:
+         sweeps (list): the new :py:class:`RFExplorer.RFESweepData.RFESweepData` objects
+        """
+        for subscription in self.subscriptions:
+            for sweep in sweeps:
+                subscription.put(sweep)
+        return
+
+    def subscribe(self, maxsize=16):
+        """Creates a new subscription to the sweeps
+    
+        Args:
+         maxsize (int): the most sweeps to hold before dropping the oldest
+    
+        Returns:
+         Subscription: the new subscription
+        """
+        subscription = Subscription(maxsize)
+        if self._reader is not None and self._reader.done():
+            subscription.close()
+        self.subscriptions.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        """Stops sending sweeps to the subscription
+    
+        Args:
+         subscription (Subscription): subscription to remove
+        """
+        self.subscriptions.discard(subscription)
+        subscription.close()
+        return
+    
+    def close_subscriptions(self, future=None):
+        """Closes all the subscriptions
+    
+        Args:
+         future: the reader's future (when used as a callback, it's ignored)
+        """
+        for subscription in self.subscriptions:
+            subscription.close()
+        return
+
+    async def sweeps(self, maxsize=16):
+        """Yields the sweeps as they come in
+    
+        Args:
+         maxsize (int): the most sweeps to buffer before dropping the oldest
+    
+        Yields:
+         :py:class:`RFExplorer.RFESweepData.RFESweepData`: the next sweep
+        """
+        subscription = self.subscribe(maxsize)
+        try:
+            async for sweep in subscription:
+                yield sweep
+        finally:
+            self.unsubscribe(subscription)
+
+    async def close(self):
+        """Stops the reader and closes the communicator"""
+        self._stop.set()
+        reader, self._reader = self._reader, None
+        try:
+            if reader is not None:
+                await reader
+        finally:
+            self.close_subscriptions()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.communicator.close)
+        return
@@ -0,0 +1,187 @@
+# python standard library
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import math
+import time
+
+# from pypi
+import numpy
+
+# this folder
+from example_1 import CommunicatorException
+from sweep_arrays import AMPLITUDE_TYPE, FREQUENCY_TYPE, amplitudes, frequencies
+
+TOLERANCE = 0.001
+
+ScanPass = namedtuple("ScanPass", ["started", "elapsed", "frequency", "amplitude"])
+
+def plan_spans(start, stop, maximum_span):
+    """Splits the band into equal spans no wider than the maximum
+
+    Args:
+     start (float): MHz to start the band at
+     stop (float): MHz to end the band at
+     maximum_span (float): the widest span (MHz) the RF Explorer can sweep
+
+    Returns:
+     list: (start, stop) tuples (MHz) for each span
+
+    Raises:
+     ValueError: the stop frequency isn't greater than the start frequency
+    """
+    if stop <= start:
+        raise ValueError("Stop ({} MHz) must be greater than start ({} MHz)".format(
+            stop, start))
+    start_khz, stop_khz = int(round(start * 1000)), int(round(stop * 1000))
+    count = math.ceil((stop_khz - start_khz) / (maximum_span * 1000))
+    edges = [start_khz + (index * (stop_khz - start_khz)) // count
+             for index in range(count + 1)]
+    return [(low / 1000, high / 1000) for low, high in zip(edges, edges[1:])]
+
+def plan(communicators, start, stop, span=None):
+    """Plans spans that all the RF Explorers can sweep
+
+    Args:
+     communicators (list): set-up :py:class:`example_1.Communicator` objects
+     start (float): MHz to start the band at
+     stop (float): MHz to end the band at
+     span (float|None): widest span to use (None means the largest allowed)
+
+    Returns:
+     list: (start, stop) tuples (MHz) for each span
+    """
+    rf_explorers = [communicator.rf_explorer for communicator in communicators]
+    maximum_span = min(rf_explorer.MaxSpanMHZ for rf_explorer in rf_explorers)
+    if span is not None:
+        maximum_span = min(span, maximum_span)
+    start = max([start] + [rf_explorer.MinFreqMHZ for rf_explorer in rf_explorers])
+    stop = min([stop] + [rf_explorer.MaxFreqMHZ for rf_explorer in rf_explorers])
+    return plan_spans(start, stop, maximum_span)
+
+def stitch(sweeps):
+    """Combines the sweeps for the spans into one spectrum
+
+    Args:
+     sweeps (list): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects (in any order)
+
+    Returns:
+     tuple: frequency (MHz) and amplitude (dBm) arrays for the whole band
+    """
+    frequency_pieces, amplitude_pieces = [], []
+    end = -math.inf
+    for sweep in sorted(sweeps, key=lambda sweep: sweep.StartFrequencyMHZ):
+        frequency, amplitude = frequencies(sweep), amplitudes(sweep)
+        keep = frequency > end + TOLERANCE
+        frequency_pieces.append(frequency[keep])
+        amplitude_pieces.append(amplitude[keep])
+        if len(frequency):
+            end = max(end, frequency[-1])
+    if not frequency_pieces:
+        return (numpy.empty(0, dtype=FREQUENCY_TYPE),
+                numpy.empty(0, dtype=AMPLITUDE_TYPE))
+    return numpy.concatenate(frequency_pieces), numpy.concatenate(amplitude_pieces)
+
+class BandScanner(object):
+    """Scans a band wider than one span using one or more RF Explorers
+
+    Args:
+     communicators (list): set-up :py:class:`example_1.Communicator` objects
+     start (float): MHz to start the band at
+     stop (float): MHz to end the band at
+     span (float|None): widest span to use (None means the largest allowed)
+     timeout (float|None): Seconds to wait for each span's sweep
+    """
+    def __init__(self, communicators, start, stop, span=None, timeout=10):
+        self.communicators = list(communicators)
+        self.timeout = timeout
+        self.spans = plan(self.communicators, start, stop, span)
+        count = len(self.communicators)
+        self.assignments = [self.spans[index::count] for index in range(count)]
+        self._configured = {}
+        return
+
+    def wait_for_span(self, communicator, start, requested):
+        """Waits for a sweep of the span
+    
+        Args:
+         communicator (:py:class:`example_1.Communicator`): the RF Explorer's communicator
+         start (float): the span's start frequency (MHz)
+         requested (datetime.datetime): when the configuration was sent
+    
+        Returns:
+         :py:class:`RFExplorer.RFESweepData.RFESweepData`: sweep of the span
+    
+        Raises:
+         CommunicatorException: the sweep didn't show up in time
+        """
+        acquisition = communicator.acquisition
+    
+        def is_span():
+            sweep = acquisition.latest_sweep()
+            return (sweep is not None
+                    and abs(sweep.StartFrequencyMHZ - start) < TOLERANCE
+                    and sweep.CaptureTime > requested)
+    
+        if not acquisition.wait_for(is_span, self.timeout):
+            raise CommunicatorException(
+                "Timed out waiting for a sweep starting at {} MHz: port={}".format(
+                    start, communicator.serial_port))
+        return acquisition.latest_sweep()
+
+    def scan_spans(self, communicator, spans):
+        """Sweeps each of the spans with one RF Explorer
+    
+        Args:
+         communicator (:py:class:`example_1.Communicator`): the RF Explorer's communicator
+         spans (list): (start, stop) tuples to sweep
+    
+        Returns:
+         list: a :py:class:`RFExplorer.RFESweepData.RFESweepData` for each span
+        """
+        timings = communicator.acquisition.timings
+        sweeps = []
+        for start, stop in spans:
+            requested = datetime.now()
+            reconfigure = self._configured.get(communicator) != (start, stop)
+            if reconfigure:
+                communicator.rf_explorer.UpdateDeviceConfig(start, stop)
+                self._configured[communicator] = (start, stop)
+            sent = time.monotonic()
+            sweeps.append(self.wait_for_span(communicator, start, requested))
+            if reconfigure:
+                timings.record("first-sweep", time.monotonic() - sent)
+        return sweeps
+
+    def scan(self):
+        """Makes one pass across the band
+    
+        Returns:
+         ScanPass: the start time, seconds it took, and the stitched spectrum
+    
+        Raises:
+         CommunicatorException: one of the RF Explorers timed out
+        """
+        started = datetime.now()
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(self.communicators)) as executor:
+            results = executor.map(self.scan_spans, self.communicators,
+                                   self.assignments)
+            sweeps = [sweep for result in results for sweep in result]
+        frequency, amplitude = stitch(sweeps)
+        return ScanPass(started, time.monotonic() - start_time, frequency, amplitude)
+
+    def passes(self, count=None):
+        """Scans the band over and over
+    
+        Args:
+         count (int|None): the number of passes (None means keep going)
+    
+        Yields:
+         ScanPass: the result of each pass
+        """
+        completed = 0
+        while count is None or completed < count:
+            yield self.scan()
+            completed += 1
+        return
@@ -0,0 +1,364 @@
+# python standard library
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from importlib.metadata import version
+import argparse
+import io
+import json
+import multiprocessing
+import platform
+import resource
+import time
+
+# from pypi
+import numpy
+import RFExplorer
+from RFExplorer.RFESweepData import RFESweepData
+
+# this folder
+from capture_file import CaptureReader
+from csv_exporter import CSVExporter
+from example_1 import Communicator
+from simulator import SimulatedRFExplorer
+
+START = 1000
+STAGES = ("parse", "ingest", "peak", "dump", "csv")
+
+def peak_rss():
+    """The most memory this process has used so far
+
+    Returns:
+     int: the peak resident set size (kilobytes on linux)
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def summarize(seconds):
+    """Gets the statistics for a set of measurements
+
+    Args:
+     seconds (numpy.ndarray): how long each one took
+
+    Returns:
+     dict: count, mean, minimum, 50th, 90th and 99th percentiles, and maximum
+    """
+    p50, p90, p99 = numpy.percentile(seconds, [50, 90, 99])
+    return dict(count=len(seconds), mean=float(seconds.mean()),
+                minimum=float(seconds.min()), p50=float(p50), p90=float(p90),
+                p99=float(p99), maximum=float(seconds.max()))
+
+def sweep_source(span, steps, seed=0, capture=None):
+    """Creates the simulator to get the sweeps from
+
+    Args:
+     span (float): MHz from the first to the last step
+     steps (int): the number of steps in a sweep
+     seed (int): seed for the made-up sweeps
+     capture (str|None): path to a capture file to replay
+
+    Returns:
+     :py:class:`simulator.SimulatedRFExplorer`: source of the amplitudes
+    """
+    if capture is None:
+        return SimulatedRFExplorer(start=START, stop=START + span, steps=steps,
+                                   signal=START + span / 2, seed=seed)
+    reader = CaptureReader(capture)
+    header = reader.header
+    return SimulatedRFExplorer(
+        start=header.start_frequency,
+        stop=header.start_frequency + header.step_frequency * (header.steps - 1),
+        recorded=reader.amplitudes())
+
+def run_case(span, steps, sweeps=2000, warmup=50, seed=0, capture=None):
+    """Times each stage for a set of sweeps
+
+    Args:
+     span (float): MHz from the first to the last step
+     steps (int): the number of steps in a sweep
+     sweeps (int): the number of sweeps to time
+     warmup (int): extra sweeps to run first that don't get timed
+     seed (int): seed for the made-up sweeps
+     capture (str|None): path to a capture file to replay
+
+    Returns:
+     dict: the case's settings, sweeps per second, peak RSS and stage statistics
+    """
+    baseline = peak_rss()
+    source = sweep_source(span, steps, seed, capture)
+    start, steps = source.start_frequency, source.steps
+    step = (source.stop_frequency - start) / (steps - 1)
+    lines = ["$S" + source.encoded(index).tobytes().decode("latin_1")
+             for index in range(warmup + sweeps)]
+    times = numpy.zeros((warmup + sweeps, len(STAGES) + 1))
+
+    rf_explorer = RFExplorer.RFECommunicator()
+    rf_explorer.m_bPortConnected = True
+    collection = rf_explorer.SweepData
+    exporter = CSVExporter(output=io.StringIO())
+    try:
+        for index, line in enumerate(lines):
+            times[index, 0] = time.perf_counter()
+            sweep = RFESweepData(start, step, steps)
+            sweep.ProcessReceivedString(line, 0.0)
+            times[index, 1] = time.perf_counter()
+
+            with rf_explorer.m_hQueueLock:
+                rf_explorer.m_objQueue.put(sweep)
+            rf_explorer.ProcessReceivedString(True)
+            latest = collection.GetData(collection.Count - 1)
+            if collection.IsFull():
+                collection.CleanAll()
+                rf_explorer.HoldMode = False
+            times[index, 2] = time.perf_counter()
+
+            peak_step = latest.GetPeakStep()
+            latest.GetAmplitude_DBM(peak_step)
+            latest.GetFrequencyMHZ(peak_step)
+            times[index, 3] = time.perf_counter()
+
+            latest.Dump()
+            times[index, 4] = time.perf_counter()
+
+            exporter.line(latest)
+            times[index, 5] = time.perf_counter()
+    finally:
+        rf_explorer.m_bPortConnected = False
+        rf_explorer.Close()
+
+    elapsed = numpy.diff(times[warmup:], axis=1)
+    total = elapsed.sum(axis=1)
+    return dict(span=round(step * (steps - 1), 3), steps=steps, sweeps=sweeps,
+                sweeps_per_second=float(sweeps / total.sum()),
+                baseline_rss=baseline, peak_rss=peak_rss(),
+                stages={name: summarize(elapsed[:, column])
+                        for column, name in enumerate(STAGES)},
+                total=summarize(total))
+
+def run_cases(spans, step_counts, sweeps=2000, warmup=50, seed=0, capture=None):
+    """Runs each case in its own process
+
+    Args:
+     spans (list): MHz spans to try
+     step_counts (list): numbers of steps to try
+     sweeps (int): the number of sweeps to time in each case
+     warmup (int): extra sweeps to run first that don't get timed
+     seed (int): seed for the made-up sweeps
+     capture (str|None): path to a capture file to replay (replaces the spans and steps)
+
+    Returns:
+     list: the result dict for each case
+    """
+    cases = [(None, None)] if capture else [(span, steps) for span in spans
+                                            for steps in step_counts]
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for span, steps in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(run_case, span, steps, sweeps,
+                                           warmup, seed, capture).result())
+    return results
+
+def run_serial(fast_parser, seconds=5, steps=112, baud_rate=500000, seed=0):
+    """Counts the sweeps that get through the receive-thread
+
+    Args:
+     fast_parser (bool): use the fast parser instead of the RFExplorer parser
+     seconds (float): how long to count the sweeps for
+     steps (int): the number of steps in a sweep
+     baud_rate (int): the signaling rate for the simulated serial line
+     seed (int): seed for the made-up sweeps
+
+    Returns:
+     dict: the settings, sweeps sent and received, and CPU time per sweep
+    """
+    with SimulatedRFExplorer(steps=steps, sweep_rate=None, baud_rate=baud_rate,
+                             seed=seed) as simulator:
+        communicator = Communicator(simulator.port, baud_rate, settle_time=0.5,
+                                    timeout=10, fast_parser=fast_parser)
+        try:
+            communicator.connect([simulator.port_info])
+            communicator.initialize()
+            acquisition = communicator.acquisition
+            acquisition.new_sweeps(timeout=1)
+            sent, received = simulator.sweeps_sent, 0
+            started, cpu = time.monotonic(), time.process_time()
+            while time.monotonic() - started < seconds:
+                received += len(acquisition.new_sweeps(timeout=1))
+            elapsed = time.monotonic() - started
+            cpu = time.process_time() - cpu
+            sent = simulator.sweeps_sent - sent
+        finally:
+            communicator.close()
+    return dict(parser="fast" if fast_parser else "rfexplorer", steps=steps,
+                baud_rate=baud_rate, sweeps_sent=sent, sweeps_received=received,
+                sweeps_per_second=received / elapsed,
+                cpu_per_sweep=cpu / max(received, 1))
+
+def run_serials(seconds=5, steps=112, baud_rate=500000, seed=0):
+    """Runs the serial benchmark for both parsers in their own processes
+
+    Args:
+     seconds (float): how long to count the sweeps for
+     steps (int): the number of steps in a sweep
+     baud_rate (int): the signaling rate for the simulated serial line
+     seed (int): seed for the made-up sweeps
+
+    Returns:
+     list: the result dict for each parser
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for fast_parser in (False, True):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(run_serial, fast_parser, seconds, steps,
+                                           baud_rate, seed).result())
+    return results
+
+def report(results):
+    """Makes a table of the results
+
+    Args:
+     results (list): the result dicts from run_cases
+
+    Returns:
+     str: one line for each stage of each case
+    """
+    lines = ["{:>8}{:>7}{:>12}{:>10}  {:<8}{:>10}{:>10}{:>10}".format(
+        "span", "steps", "sweeps/s", "rss (KB)", "stage", "p50 us", "p90 us",
+        "p99 us")]
+    for result in results:
+        prefix = "{:>8}{:>7}{:>12.1f}{:>10}".format(
+            result["span"], result["steps"], result["sweeps_per_second"],
+            result["peak_rss"])
+        for name in STAGES + ("total",):
+            stage = result["total"] if name == "total" else result["stages"][name]
+            lines.append("{}  {:<8}{:>10.1f}{:>10.1f}{:>10.1f}".format(
+                prefix, name, stage["p50"] * 10**6, stage["p90"] * 10**6,
+                stage["p99"] * 10**6))
+            prefix = " " * len(prefix)
+    return "\n".join(lines)
+
+def report_serial(results):
+    """Makes a table of the serial benchmark results
+
+    Args:
+     results (list): the result dicts from run_serials
+
+    Returns:
+     str: one line for each parser
+    """
+    lines = ["{:<12}{:>7}{:>8}{:>10}{:>10}{:>12}{:>12}".format(
+        "parser", "steps", "baud", "sent", "received", "sweeps/s", "cpu us")]
+    for result in results:
+        lines.append("{:<12}{:>7}{:>8}{:>10}{:>10}{:>12.1f}{:>12.1f}".format(
+            result["parser"], result["steps"], result["baud_rate"],
+            result["sweeps_sent"], result["sweeps_received"],
+            result["sweeps_per_second"], result["cpu_per_sweep"] * 10**6))
+    return "\n".join(lines)
+
+def compare(old, new):
+    """Compares two sets of results
+
+    Args:
+     old (list): the result dicts from an earlier run
+     new (list): the result dicts from this run
+
+    Returns:
+     str: one line for each case that's in both runs
+    """
+    previous = {(result["span"], result["steps"]): result for result in old}
+    lines = ["{:>8}{:>7}{:>11}".format("span", "steps", "sweeps/s")
+             + "".join("{:>9}".format(name) for name in STAGES)]
+    for result in new:
+        before = previous.get((result["span"], result["steps"]))
+        if before is None:
+            continue
+        ratios = [result["stages"][name]["p50"] / before["stages"][name]["p50"]
+                  for name in STAGES]
+        lines.append("{:>8}{:>7}{:>10.2f}x".format(
+            result["span"], result["steps"],
+            result["sweeps_per_second"] / before["sweeps_per_second"])
+                     + "".join("{:>8.2f}x".format(ratio) for ratio in ratios))
+    return "\n".join(lines)
+
+def argument_parser():
+    """Builds the argument parser
+
+    Returns:
+     ArgumentParser: object to parse the arguments
+    """
+    parser = argparse.ArgumentParser("RF Explorer Benchmark")
+    parser.add_argument(
+        "--spans", type=float, nargs="+", default=[10, 100, 600],
+        help="Spans (MHz) to try (default=%(default)s)")
+    parser.add_argument(
+        "--steps", type=int, nargs="+", default=[112, 255],
+        help="Numbers of steps to try (default=%(default)s)")
+    parser.add_argument(
+        "--sweeps", type=int, default=2000,
+        help="Sweeps to time in each case (default=%(default)s)")
+    parser.add_argument(
+        "--warmup", type=int, default=50,
+        help="Sweeps to run before timing (default=%(default)s)")
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="Seed for the made-up sweeps (default=%(default)s)")
+    parser.add_argument(
+        "--capture", type=str, default=None,
+        help="Capture file to replay instead of making up sweeps")
+    parser.add_argument(
+        "--serial", action="store_true",
+        help="Compare the parsers through the simulator instead of timing the stages")
+    parser.add_argument(
+        "--seconds", type=float, default=5,
+        help="Seconds to count sweeps for with --serial (default=%(default)s)")
+    parser.add_argument(
+        "--baud-rate", type=int, default=500000,
+        help="Simulated baud rate for --serial (default=%(default)s)")
+    parser.add_argument(
+        "--output", type=str, default="benchmark.json",
+        help="File to save the results in (default=%(default)s)")
+    parser.add_argument(
+        "--compare", type=str, default=None,
+        help="Results file from an earlier run to compare to")
+    return parser
+
+def main(arguments):
+    """Runs the benchmark
+
+    Args:
+     arguments (argparse.Namespace): object with the settings
+    """
+    if arguments.serial:
+        results = run_serials(arguments.seconds, arguments.steps[0],
+                              arguments.baud_rate, arguments.seed)
+        print(report_serial(results))
+        with open(arguments.output, "w") as writer:
+            json.dump(dict(created=datetime.now().isoformat(),
+                           python=platform.python_version(),
+                           platform=platform.platform(),
+                           rfexplorer=version("RFExplorer"),
+                           serial=results), writer, indent=2)
+        return
+
+    results = run_cases(arguments.spans, arguments.steps, arguments.sweeps,
+                        arguments.warmup, arguments.seed, arguments.capture)
+    print(report(results))
+    output = dict(created=datetime.now().isoformat(),
+                  python=platform.python_version(),
+                  platform=platform.platform(),
+                  rfexplorer=version("RFExplorer"),
+                  capture=arguments.capture,
+                  cases=results)
+    with open(arguments.output, "w") as writer:
+        json.dump(output, writer, indent=2)
+
+    if arguments.compare is not None:
+        with open(arguments.compare) as reader:
+            old = json.load(reader)
+        print()
+        print(compare(old["cases"], results))
+    return
+
+if __name__ == "__main__":
+    parser = argument_parser()
+    main(parser.parse_args())
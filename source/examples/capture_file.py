@@ -0,0 +1,298 @@
+# python standard library
+import os
+import struct
+
+# from pypi
+import numpy
+
+# this folder
+from sweep_arrays import frequency_steps
+
+MAGIC = b"RFECAPT1"
+HEADER_SIZE = 64
+HEADER_FORMAT = struct.Struct("<8sddIB")
+AMPLITUDE_TYPES = ("float32", "uint8")
+
+def record_type(steps, amplitude_type="float32"):
+    """Builds the numpy type for one sweep record
+
+    Args:
+     steps (int): the number of steps in each sweep
+     amplitude_type (str): 'float32' or 'uint8'
+
+    Returns:
+     numpy.dtype: structured type with capture_time and amplitude fields
+    """
+    return numpy.dtype([("capture_time", "<M8[us]"),
+                        ("amplitude", "<f4" if amplitude_type == "float32"
+                         else "u1", (steps,))])
+
+class CaptureHeader(object):
+    """The configuration for a capture file
+
+    Args:
+     start_frequency (float): MHz of the first step
+     step_frequency (float): MHz between steps
+     steps (int): the number of steps in each sweep
+     amplitude_type (str): 'float32' or 'uint8'
+
+    Raises:
+     ValueError: the amplitude type isn't one we know about
+    """
+    def __init__(self, start_frequency, step_frequency, steps,
+                 amplitude_type="float32"):
+        if amplitude_type not in AMPLITUDE_TYPES:
+            raise ValueError("Unknown amplitude type: {}".format(amplitude_type))
+        self.start_frequency = start_frequency
+        self.step_frequency = step_frequency
+        self.steps = steps
+        self.amplitude_type = amplitude_type
+        self.dtype = record_type(steps, amplitude_type)
+        return
+
+    def pack(self):
+        """Converts the header to bytes
+    
+        Returns:
+         bytes: the HEADER_SIZE bytes to put at the start of the file
+        """
+        packed = HEADER_FORMAT.pack(MAGIC, self.start_frequency,
+                                    self.step_frequency, self.steps,
+                                    AMPLITUDE_TYPES.index(self.amplitude_type))
+        return packed.ljust(HEADER_SIZE, b"\0")
+
+    @classmethod
+    def unpack(cls, data):
+        """Builds the header from the bytes at the start of a file
+    
+        Args:
+         data (bytes): the first HEADER_SIZE bytes of the file
+    
+        Returns:
+         CaptureHeader: the file's header
+    
+        Raises:
+         ValueError: the bytes aren't a capture-file header
+        """
+        if len(data) < HEADER_SIZE:
+            raise ValueError("Header is too short: {} bytes".format(len(data)))
+        magic, start, step, steps, amplitude_type = HEADER_FORMAT.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a capture file (magic={})".format(magic))
+        if amplitude_type >= len(AMPLITUDE_TYPES):
+            raise ValueError("Unknown amplitude type code: {}".format(amplitude_type))
+        return cls(start, step, steps, AMPLITUDE_TYPES[amplitude_type])
+
+    @classmethod
+    def from_sweep(cls, sweep, amplitude_type="float32"):
+        """Builds the header for sweeps configured like this one
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): example sweep
+         amplitude_type (str): 'float32' or 'uint8'
+    
+        Returns:
+         CaptureHeader: header matching the sweep
+        """
+        return cls(sweep.StartFrequencyMHZ, sweep.StepFrequencyMHZ,
+                   sweep.TotalSteps, amplitude_type)
+    
+    def matches(self, sweep):
+        """Checks if the sweep has the same configuration as the header
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): sweep to check
+    
+        Returns:
+         bool: True if the sweep can go in a file with this header
+        """
+        return (sweep.TotalSteps == self.steps
+                and abs(sweep.StartFrequencyMHZ - self.start_frequency) < 0.001
+                and abs(sweep.StepFrequencyMHZ - self.step_frequency) < 0.001)
+
+    def records(self, sweeps):
+        """Converts sweeps to records
+    
+        Args:
+         sweeps (list): the :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to convert
+    
+        Returns:
+         numpy.ndarray: a record (with this header's dtype) for each sweep
+    
+        Raises:
+         ValueError: a sweep doesn't match the header's configuration
+        """
+        records = numpy.empty(len(sweeps), dtype=self.dtype)
+        amplitudes = numpy.empty((len(sweeps), self.steps), dtype=numpy.float32)
+        for row, sweep in enumerate(sweeps):
+            if not self.matches(sweep):
+                raise ValueError(
+                    "Sweep at {} doesn't match the configuration".format(
+                        sweep.CaptureTime))
+            records["capture_time"][row] = sweep.CaptureTime
+            amplitudes[row] = sweep.m_arrAmplitude[:self.steps]
+        if self.amplitude_type == "uint8":
+            amplitudes = numpy.clip(numpy.rint(amplitudes * -2), 0, 255)
+        records["amplitude"] = amplitudes
+        return records
+
+class CaptureWriter(object):
+    """Appends sweeps to a capture file
+
+    Args:
+     path (str): the file to write
+     amplitude_type (str): 'float32' or 'uint8' (ignored if appending to an existing file)
+    """
+    def __init__(self, path, amplitude_type="float32"):
+        self.path = path
+        self.amplitude_type = amplitude_type
+        self.header = None
+        self._file = None
+        return
+
+    def __enter__(self):
+        """returns this object"""
+        return self
+    
+    def __exit__(self, type, value, traceback):
+        """closes the file"""
+        self.close()
+        return
+
+    def open(self, sweep):
+        """Opens the file for appending, creating it if needed
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the first sweep to write
+    
+        Raises:
+         ValueError: the existing file has a different configuration than the sweep
+        """
+        if os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, "rb") as reader:
+                self.header = CaptureHeader.unpack(reader.read(HEADER_SIZE))
+            if not self.header.matches(sweep):
+                raise ValueError(
+                    "{} has a different configuration than the sweeps".format(
+                        self.path))
+            size = os.path.getsize(self.path)
+            complete = HEADER_SIZE + (((size - HEADER_SIZE)
+                                       // self.header.dtype.itemsize)
+                                      * self.header.dtype.itemsize)
+            self._file = open(self.path, "r+b")
+            self._file.truncate(complete)
+            self._file.seek(complete)
+        else:
+            self.header = CaptureHeader.from_sweep(sweep, self.amplitude_type)
+            self._file = open(self.path, "wb")
+            self._file.write(self.header.pack())
+        return
+
+    def write(self, sweeps):
+        """Appends the sweeps to the file
+    
+        Args:
+         sweeps (list): the :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to write
+    
+        Returns:
+         int: the number of sweeps written
+    
+        Raises:
+         ValueError: a sweep doesn't match the file's configuration
+        """
+        if not sweeps:
+            return 0
+        if self._file is None:
+            self.open(sweeps[0])
+        try:
+            records = self.header.records(sweeps)
+        except ValueError as error:
+            raise ValueError("{} ({})".format(error, self.path))
+        self._file.write(records.tobytes())
+        return len(sweeps)
+
+    def flush(self):
+        """Flushes the file's buffer"""
+        if self._file is not None:
+            self._file.flush()
+        return
+    
+    def close(self):
+        """Closes the file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return
+
+class CaptureReader(object):
+    """Memory-mapped view of a capture file
+
+    Args:
+     path (str): the file to read
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as reader:
+            self.header = CaptureHeader.unpack(reader.read(HEADER_SIZE))
+        self._records = None
+        return
+
+    def __len__(self):
+        """The number of sweeps in the file
+    
+        Returns:
+         int: the number of complete records
+        """
+        return len(self.records)
+
+    @property
+    def records(self):
+        """The records in the file
+    
+        Returns:
+         numpy.memmap: read-only array of (capture_time, amplitude) records
+        """
+        if self._records is None:
+            count = ((os.path.getsize(self.path) - HEADER_SIZE)
+                     // self.header.dtype.itemsize)
+            if count == 0:
+                self._records = numpy.empty(0, dtype=self.header.dtype)
+            else:
+                self._records = numpy.memmap(self.path, dtype=self.header.dtype,
+                                             mode="r", offset=HEADER_SIZE,
+                                             shape=(count,))
+        return self._records
+    
+    @property
+    def capture_times(self):
+        """The capture times of the sweeps
+    
+        Returns:
+         numpy.ndarray: datetime64 array (mapped from the file)
+        """
+        return self.records["capture_time"]
+
+    def amplitudes(self, start=None, stop=None):
+        """Gets the amplitudes (dBm) for a run of sweeps
+    
+        Args:
+         start (int|None): index of the first sweep (None means the first one)
+         stop (int|None): index after the last sweep (None means after the last one)
+    
+        Returns:
+         numpy.ndarray: (sweeps x steps) float32 array of amplitudes
+        """
+        amplitudes = self.records["amplitude"][start:stop]
+        if self.header.amplitude_type == "uint8":
+            return amplitudes.astype(numpy.float32) / -2
+        return amplitudes
+
+    @property
+    def frequencies(self):
+        """The frequency for each step
+    
+        Returns:
+         numpy.ndarray: read-only array of frequencies (MHz)
+        """
+        return frequency_steps(self.header.start_frequency,
+                               self.header.step_frequency, self.header.steps)
@@ -0,0 +1,195 @@
+# python standard library
+from collections import namedtuple
+
+# from pypi
+import numpy
+
+# this folder
+from sweep_arrays import frequency_steps
+
+THRESHOLD = -85
+WINDOW = 100
+TOLERANCE = 0.001
+
+Channel = namedtuple("Channel", ["name", "low", "high"])
+
+ChannelStatistics = namedtuple("ChannelStatistics", [
+    "channel", "occupancy", "duty_cycle", "mean_power", "peak_power"])
+
+WIFI_CHANNELS = tuple(Channel(str(number), 2402 + 5 * (number - 1),
+                              2422 + 5 * (number - 1))
+                      for number in range(1, 12))
+NON_OVERLAPPING = tuple(channel for channel in WIFI_CHANNELS
+                        if channel.name in ("1", "6", "11"))
+
+def channel_sums(values, starts, stops):
+    """Adds up the values in each run of steps
+
+    Args:
+     values (numpy.ndarray): (sweeps x steps) array
+     starts (numpy.ndarray): first step of each channel
+     stops (numpy.ndarray): step after the last step of each channel
+
+    Returns:
+     numpy.ndarray: (sweeps x channels) array of sums
+    """
+    totals = numpy.zeros((values.shape[0], values.shape[1] + 1), dtype=numpy.float64)
+    numpy.cumsum(values, axis=1, out=totals[:, 1:])
+    return totals[:, stops] - totals[:, starts]
+
+class ChannelOccupancy(object):
+    """Rolling per-channel statistics for sweeps
+
+    Args:
+     channels (tuple): the :py:class:`Channel` tuples to measure
+     threshold (float): dBm above which a step (or channel) counts as busy
+     window (int): number of sweeps to keep statistics for
+    """
+    def __init__(self, channels=WIFI_CHANNELS, threshold=THRESHOLD, window=WINDOW):
+        self.channels = tuple(channels)
+        self.threshold = threshold
+        self.window = window
+        self.configuration = None
+        self.starts = None
+        self.stops = None
+        self.covered = None
+        self.builds = 0
+        self.reset()
+        return
+
+    def reset(self):
+        """Empties the window"""
+        shape = (self.window, len(self.channels))
+        self.occupancy = numpy.zeros(shape, dtype=numpy.float64)
+        self.busy = numpy.zeros(shape, dtype=bool)
+        self.power = numpy.zeros(shape, dtype=numpy.float64)
+        self.peak = numpy.full(shape, -numpy.inf, dtype=numpy.float64)
+        self.count = 0
+        self.sweeps = 0
+        return
+
+    def is_same_configuration(self, sweep):
+        """Checks if the sweep has the frequencies the index was built for
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to check
+    
+        Returns:
+         bool: True if the index can be used for the sweep
+        """
+        if self.configuration is None:
+            return False
+        start, step, steps = self.configuration
+        return (sweep.TotalSteps == steps
+                and abs(sweep.StartFrequencyMHZ - start) < TOLERANCE
+                and abs(sweep.StepFrequencyMHZ - step) < TOLERANCE)
+
+    def build_index(self, sweep):
+        """Finds the steps for each channel
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): a sweep with the new configuration
+        """
+        self.configuration = (sweep.StartFrequencyMHZ, sweep.StepFrequencyMHZ,
+                              sweep.TotalSteps)
+        frequency = frequency_steps(*self.configuration)
+        lows = numpy.array([channel.low for channel in self.channels])
+        highs = numpy.array([channel.high for channel in self.channels])
+        self.starts = numpy.searchsorted(frequency, lows - TOLERANCE)
+        self.stops = numpy.searchsorted(frequency, highs + TOLERANCE, side="right")
+        self.stops = numpy.maximum(self.stops, self.starts)
+        self.covered = self.stops > self.starts
+        self.builds += 1
+        self.reset()
+        return
+
+    def measure(self, amplitude):
+        """Works out the per-channel values for each sweep
+    
+        Args:
+         amplitude (numpy.ndarray): (sweeps x steps) amplitudes (dBm)
+    
+        Returns:
+         tuple: (sweeps x channels) occupancy, busy, mean power (mW) and peak (dBm) arrays
+        """
+        counts = numpy.maximum(self.stops - self.starts, 1)
+        occupancy = channel_sums(amplitude > self.threshold,
+                                 self.starts, self.stops) / counts
+        power = channel_sums(10 ** (amplitude / 10), self.starts, self.stops) / counts
+        busy = power > 10 ** (self.threshold / 10)
+        padded = numpy.pad(amplitude, ((0, 0), (0, 1)), constant_values=-numpy.inf)
+        edges = numpy.column_stack((self.starts, self.stops)).ravel()
+        peak = numpy.maximum.reduceat(padded, edges, axis=1)[:, ::2]
+        peak[:, ~self.covered] = -numpy.inf
+        return occupancy, busy, power, peak
+
+    def extend(self, sweeps):
+        """Adds the sweeps to the statistics
+    
+        Args:
+         sweeps (list): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects in order
+    
+        Returns:
+         int: the number of sweeps added
+        """
+        sweeps = list(sweeps)
+        start = 0
+        while start < len(sweeps):
+            if not self.is_same_configuration(sweeps[start]):
+                self.build_index(sweeps[start])
+            stop = start + 1
+            while stop < len(sweeps) and self.is_same_configuration(sweeps[stop]):
+                stop += 1
+            steps = self.configuration[2]
+            run = sweeps[max(start, stop - self.window):stop]
+            amplitude = numpy.array([sweep.m_arrAmplitude[:steps] for sweep in run],
+                                    dtype=numpy.float64).reshape(len(run), steps)
+            rows = (self.sweeps + numpy.arange(len(run))) % self.window
+            (self.occupancy[rows], self.busy[rows],
+             self.power[rows], self.peak[rows]) = self.measure(amplitude)
+            self.sweeps += len(run)
+            self.count = min(self.count + len(run), self.window)
+            start = stop
+        return len(sweeps)
+
+    def statistics(self):
+        """Averages the window
+    
+        Returns:
+         list: a :py:class:`ChannelStatistics` for each channel
+        """
+        if not self.count:
+            return [ChannelStatistics(channel, numpy.nan, numpy.nan, numpy.nan, numpy.nan)
+                    for channel in self.channels]
+        rows = slice(0, self.count)
+        occupancy = self.occupancy[rows].mean(axis=0)
+        duty_cycle = self.busy[rows].mean(axis=0)
+        with numpy.errstate(divide="ignore"):
+            mean_power = 10 * numpy.log10(self.power[rows].mean(axis=0))
+        peak_power = self.peak[rows].max(axis=0)
+        statistics = []
+        for index, channel in enumerate(self.channels):
+            if self.covered[index]:
+                statistics.append(ChannelStatistics(
+                    channel, float(occupancy[index]), float(duty_cycle[index]),
+                    float(mean_power[index]), float(peak_power[index])))
+            else:
+                statistics.append(ChannelStatistics(channel, numpy.nan, numpy.nan,
+                                                    numpy.nan, numpy.nan))
+        return statistics
+
+    def report(self):
+        """Makes a table of the statistics for each channel
+    
+        Returns:
+         str: one line per channel
+        """
+        lines = ["{:<8}{:>14}{:>11}{:>11}{:>12}{:>12}".format(
+            "channel", "MHz", "occupancy", "duty", "mean dBm", "peak dBm")]
+        for statistic in self.statistics():
+            channel = statistic.channel
+            lines.append("{:<8}{:>14}{:>11.2f}{:>11.2f}{:>12.1f}{:>12.1f}".format(
+                channel.name, "{}-{}".format(channel.low, channel.high),
+                statistic.occupancy, statistic.duty_cycle, statistic.mean_power,
+                statistic.peak_power))
+        return "\n".join(lines)
@@ -0,0 +1,241 @@
+# python standard library
+import os
+import sys
+from datetime import datetime
+
+# from pypi
+import numpy
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+AMPLITUDE = "{:04.1f}"
+SECONDS_FORMAT = "%Y-%m-%d %H:%M:%S"
+AMPLITUDE_TABLE = numpy.array([AMPLITUDE.format(index / -2 + 0.0)
+                               for index in range(256)], dtype=object)
+
+class TimestampCache(object):
+    """Formats datetimes, only re-formatting when the second changes
+
+    Args:
+     time_format (str): strftime format for the time to the second
+     microseconds (bool): if True add the microseconds (when they aren't zero)
+    """
+    def __init__(self, time_format=SECONDS_FORMAT, microseconds=True):
+        self.time_format = time_format
+        self.microseconds = microseconds
+        self._second = None
+        self._text = None
+        return
+
+    def __call__(self, moment):
+        """Formats the time
+    
+        Args:
+         moment (datetime.datetime): the time to format
+    
+        Returns:
+         str: the formatted time
+        """
+        second = moment.replace(microsecond=0)
+        if second != self._second:
+            self._second = second
+            self._text = second.strftime(self.time_format)
+        if self.microseconds and moment.microsecond:
+            return "{}.{:06d}".format(self._text, moment.microsecond)
+        return self._text
+
+def format_amplitudes(amplitudes):
+    """Formats each row of amplitudes as comma-separated text
+
+    Args:
+     amplitudes (numpy.ndarray): (sweeps x steps) amplitudes (dBm)
+
+    Returns:
+     list: a string for each row
+    """
+    doubled = amplitudes * -2
+    index = numpy.clip(doubled, 0, len(AMPLITUDE_TABLE) - 1).astype(numpy.intp)
+    exact = (index == doubled).all(axis=1)
+    texts = []
+    for row, is_exact in enumerate(exact):
+        if is_exact:
+            texts.append(",".join(AMPLITUDE_TABLE[index[row]].tolist()))
+        else:
+            texts.append(",".join(AMPLITUDE.format(amplitude)
+                                  for amplitude in amplitudes[row].tolist()))
+    return texts
+
+class CSVExporter(object):
+    """Writes the sweeps in an RFESweepDataCollection as CSV lines
+
+    Args:
+     output (file|None): file-like object to write to (default is stdout)
+     cursor_file (str|None): path to a file to persist the cursor in
+    """
+    def __init__(self, output=None, cursor_file=None):
+        self._output = output
+        self.cursor_file = cursor_file
+        self.index = 0
+        self._last_capture = None
+        self._handed_out = None
+        self._handed_out_sweep = None
+        self._last_sweep = None
+        self.timestamps = TimestampCache()
+        return
+
+    @property
+    def output(self):
+        """The file-like object to write to
+    
+        Returns:
+         file: the output (stdout if not set)
+        """
+        if self._output is None:
+            return sys.stdout
+        return self._output
+
+    @property
+    def last_capture(self):
+        """The CaptureTime of the last sweep written
+    
+        Returns:
+         datetime.datetime|None: the time of the last sweep written
+        """
+        if (self._last_capture is None and self.cursor_file is not None
+                and os.path.isfile(self.cursor_file)):
+            with open(self.cursor_file) as reader:
+                text = reader.read().strip()
+            if text:
+                self._last_capture = datetime.strptime(text, TIME_FORMAT)
+        return self._last_capture
+
+    def save_cursor(self):
+        """Saves the last capture-time to the cursor file (if there is one)"""
+        if self.cursor_file is None or self._last_capture is None:
+            return
+        temporary = self.cursor_file + ".tmp"
+        with open(temporary, "w") as writer:
+            writer.write(self._last_capture.strftime(TIME_FORMAT))
+        os.replace(temporary, self.cursor_file)
+        return
+
+    def line(self, sweep):
+        """Formats the sweep as a CSV line
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to format
+    
+        Returns:
+         str: capture-time followed by the amplitudes (with a newline)
+        """
+        return self.lines([sweep])[0]
+
+    def lines(self, sweeps):
+        """Formats the sweeps as CSV lines
+    
+        Args:
+         sweeps (list): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to format
+    
+        Returns:
+         list: a line (with a newline) for each sweep
+        """
+        lines = []
+        start = 0
+        while start < len(sweeps):
+            steps = sweeps[start].TotalSteps
+            stop = start + 1
+            while stop < len(sweeps) and sweeps[stop].TotalSteps == steps:
+                stop += 1
+            run = sweeps[start:stop]
+            amplitudes = numpy.array([sweep.m_arrAmplitude[:steps] for sweep in run],
+                                     dtype=numpy.float64).reshape(len(run), steps)
+            for sweep, text in zip(run, format_amplitudes(amplitudes)):
+                lines.append("{},{}\n".format(self.timestamps(sweep.CaptureTime), text))
+            start = stop
+        return lines
+
+    def is_cleaned(self, collection):
+        """Checks if the collection was cleaned since the last export
+    
+        Args:
+         collection (:py:class:`RFExplorer.RFESweepDataCollection.RFESweepDataCollection`): sweeps
+    
+        Returns:
+         bool: True if the index no longer lines up with the collection
+        """
+        if self.index == 0:
+            return False
+        return (collection.Count < self.index
+                or collection.GetData(self.index - 1) is not self._last_sweep)
+
+    def export(self, collection):
+        """Writes the sweeps that arrived since the last export
+    
+        Args:
+         collection (:py:class:`RFExplorer.RFESweepDataCollection.RFESweepDataCollection`): sweeps
+    
+        Returns:
+         int: the number of sweeps written
+        """
+        if self.is_cleaned(collection):
+            self.index = 0
+        sweeps = [collection.GetData(index)
+                  for index in range(self.index, collection.Count)]
+        if sweeps:
+            self._last_sweep = sweeps[-1]
+        self.index = collection.Count
+        return self.write(sweeps)
+
+    def unwritten(self, sweeps):
+        """Gets the sweeps captured after the last one written or handed out
+    
+        Args:
+         sweeps (list): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects in capture order
+    
+        Returns:
+         list: the sweeps that still need to be written
+        """
+        sweeps = list(sweeps)
+        for index in range(len(sweeps) - 1, -1, -1):
+            if sweeps[index] is self._handed_out_sweep:
+                sweeps = sweeps[index + 1:]
+                break
+        new_sweeps = []
+        last_capture = self._handed_out
+        if last_capture is None:
+            last_capture = self.last_capture
+        for sweep in sweeps:
+            if last_capture is not None and sweep.CaptureTime < last_capture:
+                continue
+            new_sweeps.append(sweep)
+            last_capture = sweep.CaptureTime
+        if new_sweeps:
+            self._handed_out = last_capture
+            self._handed_out_sweep = new_sweeps[-1]
+        return new_sweeps
+
+    def write_lines(self, lines, last_capture):
+        """Writes formatted lines and saves the cursor
+    
+        Args:
+         lines (list): CSV lines (with newlines)
+         last_capture (datetime.datetime): the CaptureTime of the last sweep in the lines
+        """
+        self.output.write("".join(lines))
+        self._last_capture = last_capture
+        self.output.flush()
+        self.save_cursor()
+        return
+
+    def write(self, sweeps):
+        """Writes the sweeps that were captured after the last one written
+    
+        Args:
+         sweeps (list): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects in capture order
+    
+        Returns:
+         int: the number of sweeps written
+        """
+        new_sweeps = self.unwritten(sweeps)
+        if new_sweeps:
+            self.write_lines(self.lines(new_sweeps), new_sweeps[-1].CaptureTime)
+        return len(new_sweeps)
@@ -6,28 +6,42 @@ from datetime import datetime, timedelta
 # from pypi
 import RFExplorer
 
-CSV_LINE = "{0},{1},{2},{3}"
-HUMAN_LINE = "{0}, Sweep[{1}]: Peak: {2:.3f} MHz\t{3} dBm"
+# this folder
+from acquisition import Acquisition
+from csv_exporter import TimestampCache
+from fast_parser import install as install_fast_parser
+from session_cache import SessionCache
+from squelch import Squelch, add_arguments as add_squelch_arguments
+from sweep_arrays import SweepArray
 
-def print_peak(rf_explorer, csv_data=False):
-    """This function prints the amplitude and frequency peak of the latest received sweep
+CSV_LINE = "{0},{1},{2},{3:.1f}"
+HUMAN_LINE = "{0}, Sweep[{1}]: Peak: {2:.3f} MHz\t{3:.1f} dBm"
+TIMESTAMP = TimestampCache("%c", microseconds=False)
+
+def print_peak(rf_explorer, csv_data=False, sweep_data=None, index=None):
+    """This function prints the amplitude and frequency peak of a sweep
 
     Args:
      rfe_explorer (`RFExplorer.RFECommunicator`): communicator to get data from
      csv_data (bool): if True, print as CSV output
+     sweep_data (`RFExplorer.RFESweepData`|None): the sweep (None means the latest received)
+     index (int|None): number to print for the sweep (None means its index in the collection)
     """
-    index = rf_explorer.SweepData.Count - 1
-    sweep_data = rf_explorer.SweepData.GetData(index)
-    peak_step = sweep_data.GetPeakStep()
-    peak_amplitude = sweep_data.GetAmplitude_DBM(peak_step)
+    if sweep_data is None:
+        index = rf_explorer.SweepData.Count - 1
+        sweep_data = rf_explorer.SweepData.GetData(index)
+    sweep = SweepArray(sweep_data)
+    peak_step = sweep.peak_step
+    peak_amplitude = float(sweep.amplitude[peak_step])
     peak_frequency = sweep_data.GetFrequencyMHZ(peak_step)
     line = CSV_LINE if csv_data else HUMAN_LINE
     
-    print(line.format(datetime.now().strftime("%c"), index, peak_frequency,
+    print(line.format(TIMESTAMP(datetime.now()), index, peak_frequency,
                       peak_amplitude))
     return
 
-
+MINIMUM_SETTLE = 0.5
+QUIET_TIME = 0.5
 
 class CommunicatorException(Exception):
     """The Communicator should raise this if something bad happens"""
@@ -39,12 +53,23 @@ class Communicator(object):
      serial_port (string|None): the name of the USB file
      baud_rate (int): the signaling rate for the serial connection
      settle_time (float): Seconds to wait after resetting
+     timeout (float|None): Seconds to wait for the device (None means forever)
+     adaptive_settle (bool): Stop settling once the device goes quiet after resetting
+     warm_start (bool): Skip the reset if the device matches the session cache
+     fast_parser (bool): Decode the sweeps in bulk instead of with the RFExplorer parser
     """
-    def __init__(self, serial_port=None, baud_rate=500000, settle_time=3):
+    def __init__(self, serial_port=None, baud_rate=500000, settle_time=3,
+                 timeout=None, adaptive_settle=False, warm_start=False,
+                 fast_parser=False):
         self.serial_port = serial_port
         self.baud_rate = baud_rate
         self.settle_time = settle_time
+        self.timeout = timeout
+        self.adaptive_settle = adaptive_settle
+        self.fast_parser = fast_parser
+        self.session_cache = SessionCache() if warm_start else None
         self._rf_explorer = None
+        self._acquisition = None
         return
 
     @property
@@ -56,7 +81,20 @@ class Communicator(object):
         """
         if self._rf_explorer is None:
             self._rf_explorer = RFExplorer.RFECommunicator()
+            if self.fast_parser:
+                install_fast_parser(self._rf_explorer)
         return self._rf_explorer
+
+    @property
+    def acquisition(self):
+        """Waits for data from the RFE Communicator
+    
+        Returns:
+         :py:class:`acquisition.Acquisition`: the (non-spinning) waiter
+        """
+        if self._acquisition is None:
+            self._acquisition = Acquisition(self.rf_explorer)
+        return self._acquisition
     
     def __enter__(self):
         """returns this object"""
@@ -79,6 +117,7 @@ class Communicator(object):
         if self._rf_explorer is not None:
             self.rf_explorer.Close()
             self._rf_explorer = None
+            self._acquisition = None
         return
 
     def set_up(self):
@@ -87,32 +126,75 @@ class Communicator(object):
         Raises:
          CommunicatorException: the setup failed
         """
+        self.connect()
+        self.initialize()
+        return
+
+    def connect(self, ports=None):
+        """Finds and connects to the RF Explorer's serial port
+    
+        Args:
+         ports (list|None): port-info objects from an earlier search (None means search now)
+    
+        Raises:
+         CommunicatorException: the connection failed
+        """
         # get candidate serial ports and print out what you discovered
-        self.rf_explorer.GetConnectedPorts()
+        if ports is None:
+            self.rf_explorer.GetConnectedPorts()
+        else:
+            self.rf_explorer.m_arrValidCP2102Ports = list(ports)
 
         #Connect to available port
         if (not self.rf_explorer.ConnectPort(self.serial_port, self.baud_rate)):
             raise CommunicatorException("Unable to connect: port={}, baud={}".format(
                 self.serial_port,
                 self.baud_rate))
+        return
 
+    def initialize(self):
+        """Resets the RF Explorer and waits for its configuration
+    
+        Raises:
+         CommunicatorException: the device didn't send its configuration in time
+        """
+        if self.session_cache is not None and self.warm_start():
+            return
+        timings = self.acquisition.timings
         print("Sending the Reset Command")
         self.rf_explorer.SendCommand("r")
+        sent = time.monotonic()
         
         print("Waiting until the device resets")
-        while(self.rf_explorer.IsResetEvent):
-            pass
-        
-        print("Reset, sleeping for {} seconds to let the device settle".format(
-            self.settle_time))
-        time.sleep(self.settle_time)
+        reset = self.acquisition.wait_for_reset(self.settle_time)
+        if reset:
+            timings.record("reset", time.monotonic() - sent)
 
+        if reset and self.adaptive_settle:
+            print("Reset, waiting up to {} seconds for the device to settle".format(
+                self.settle_time))
+            with timings.timer("settle"):
+                time.sleep(MINIMUM_SETTLE)
+                self.acquisition.wait_for_quiet(QUIET_TIME,
+                                                self.settle_time - MINIMUM_SETTLE)
+        elif reset:
+            print("Reset, sleeping for {} seconds to let the device settle".format(
+                self.settle_time))
+            with timings.timer("settle"):
+                time.sleep(self.settle_time)
+        else:
+            print("No reset seen after {} seconds, assuming the device settled".format(
+                self.settle_time))
+        
         print("requesting the RF Explorer configuration")
         self.rf_explorer.SendCommand_RequestConfigData()
+        requested = time.monotonic()
         
         print("Waiting for the model to not be None")
-        while(self.rf_explorer.ActiveModel == RFExplorer.RFE_Common.eModel.MODEL_NONE):
-            self.rf_explorer.ProcessReceivedString(True)
+        if (not self.acquisition.wait_for_model(self.timeout)):
+            raise CommunicatorException("Timed out waiting for the model: port={}".format(
+                self.serial_port))
+        timings.record("configuration", time.monotonic() - requested)
         
         print("Model is set")
 
@@ -120,8 +202,34 @@ class Communicator(object):
         if (not self.rf_explorer.IsAnalyzer()):     
             raise CommunicatorError("Error: Device connected is a Signal Generator. "
                                     "\nPlease, connect a Spectrum Analyzer")
+        if self.session_cache is not None:
+            self.session_cache.save(self.serial_port, self.rf_explorer)
         return
 
+    def warm_start(self):
+        """Asks for the configuration without resetting and checks it against the cache
+    
+        Returns:
+         bool: True if the device matched the cache (so the reset can be skipped)
+        """
+        if self.session_cache.get(self.serial_port) is None:
+            return False
+        print("Requesting the configuration to check against the session cache")
+        self.rf_explorer.SendCommand_RequestConfigData()
+        requested = time.monotonic()
+        if not self.acquisition.wait_for_model(self.settle_time):
+            print("No configuration after {} seconds, resetting".format(
+                self.settle_time))
+            return False
+        if not self.session_cache.matches(self.serial_port, self.rf_explorer):
+            print("The device doesn't match the session cache, resetting")
+            self.session_cache.forget(self.serial_port)
+            self.rf_explorer.m_eActiveModel = RFExplorer.RFE_Common.eModel.MODEL_NONE
+            return False
+        self.acquisition.timings.record("warm-start", time.monotonic() - requested)
+        print("Matched the session cache, skipping the reset")
+        return True
+
 def main(arguments, communicator):
     """Runs the example
 
@@ -130,11 +238,13 @@ def main(arguments, communicator):
      communicator (Communicator): object with the RFECommunicator
     """
     rf_explorer = communicator.rf_explorer
+    acquisition = communicator.acquisition
     try:
         communicator.set_up()
         print("Receiving data...")
         #Process until we complete scan time
-        last_index = 0
+        received = 0
+        squelch = Squelch.from_arguments(arguments)
         start = datetime.now()
         total = timedelta(seconds=arguments.run_time)
         end = start + total
@@ -142,12 +252,14 @@ def main(arguments, communicator):
         if arguments.csv_data:
             print("index,frequency (MHz), amplitude (dBm)")
         while (datetime.now() < end):
-            #Process all received data from device 
-            rf_explorer.ProcessReceivedString(True)
-            #Print data if received new sweep only
-            if (rf_explorer.SweepData.Count > last_index):
-                print_peak(rf_explorer, arguments.csv_data)
-                last_index = rf_explorer.SweepData.Count          
+            #Wait for a new sweep (but not past the end of the run)
+            remaining = (end - datetime.now()).total_seconds()
+            sweeps = acquisition.new_sweeps(remaining)
+            #Print the sweeps that get past the squelch
+            for index, sweep_data in enumerate(sweeps, start=received):
+                if squelch.filter([sweep_data]):
+                    print_peak(rf_explorer, arguments.csv_data, sweep_data, index)
+            received += len(sweeps)
     except Exception as error:
         print("Error: {}".format(error))
     return
@@ -174,11 +286,38 @@ def argument_parser():
         "--csv-data", action="store_true",
         help="Output csv-formatted data",
     )
+    parser.add_argument(
+        "--timeout", type=float, default=None,
+        help="Seconds to wait for the device before giving up (default=%(default)s)")
+    parser.add_argument(
+        "--adaptive-settle", action="store_true",
+        help="Stop waiting after the reset once the device goes quiet")
+    parser.add_argument(
+        "--warm-start", action="store_true",
+        help="Skip the reset if the device is set up the same as last time")
+    parser.add_argument(
+        "--fast-parser", action="store_true",
+        help="Decode the sweeps in bulk instead of one step at a time")
     return parser
 
+def add_arguments(parser):
+    """adds the extra command-line arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with extra arguments
+    """
+    return add_squelch_arguments(parser)
+
 if __name__ == "__main__":
-    parser = argument_parser()
+    parser = add_arguments(argument_parser())
     arguments = parser.parse_args()
 
-    with Communicator(arguments.serialport, arguments.baud_rate) as communicator:        
+    with Communicator(arguments.serialport, arguments.baud_rate,
+                      timeout=arguments.timeout,
+                      adaptive_settle=arguments.adaptive_settle,
+                      warm_start=arguments.warm_start,
+                      fast_parser=arguments.fast_parser) as communicator:
         main(arguments, communicator)
@@ -1,15 +1,33 @@
-# python standard library
-import time
-
-# from pypi
-import RFExplorer
-
 # this folder
+from band_scan import TOLERANCE, BandScanner
 from example_1 import (
+    TIMESTAMP,
     Communicator,
     argument_parser,
-    print_peak,
 )
+from orchestrator import Orchestrator
+
+PASS_LINE = "{0}, Pass[{1}]: {2:.3f} seconds"
+SPAN_LINE = "Freq range[{0}]: {1} - {2} MHz Peak: {3:.3f} MHz\t{4} dBm"
+
+def print_peaks(scanner, index, scan_pass):
+    """Prints how long a pass took and the peak for each of its spans
+
+    Args:
+     scanner (:py:class:`band_scan.BandScanner`): the scanner that made the pass
+     index (int): the number of the pass
+     scan_pass (:py:class:`band_scan.ScanPass`): the pass across the band
+    """
+    print(PASS_LINE.format(TIMESTAMP(scan_pass.started), index, scan_pass.elapsed))
+    frequency, amplitude = scan_pass.frequency, scan_pass.amplitude
+    for span, (start, stop) in enumerate(scanner.spans, start=1):
+        low = frequency.searchsorted(start - TOLERANCE, side="left")
+        high = frequency.searchsorted(stop + TOLERANCE, side="right")
+        if high <= low:
+            continue
+        peak = low + int(amplitude[low:high].argmax())
+        print(SPAN_LINE.format(span, start, stop, frequency[peak], amplitude[peak]))
+    return
 
 def check_settings(rf_explorer, arguments):
     """This functions check user settings
@@ -63,58 +81,64 @@ def check_settings(rf_explorer, arguments):
     
     return rf_explorer.SpanMHZ, rf_explorer.StartFrequencyMHZ, stop_frequency
 
+def scan(arguments, communicators, timeout=None, clean=False):
+    """Scans the band and prints the peaks
+
+    Args:
+     arguments (:py:class:`argparse.Namespace`): thing with parameters
+     communicators (list): set-up ``Communicator`` objects to split the spans between
+     timeout (float|None): Seconds to wait for each span's sweep (None means forever)
+     clean (bool): if True, empty the sweep collections before scanning
+    """
+    try:
+        print("User settings:\n"
+              + "Start freq: {} MHz".format(arguments.scan_start)
+              + " - "
+              + "Stop freq: {} MHz".format(arguments.scan_stop))
+        if clean:
+            for communicator in communicators:
+                communicator.rf_explorer.SweepData.CleanAll()
+        scanner = BandScanner(communicators, arguments.scan_start,
+                              arguments.scan_stop, arguments.span_size,
+                              timeout=timeout)
+        print("Scanning {} spans with {} RF Explorer(s)".format(
+            len(scanner.spans), len(scanner.communicators)))
+        for index, scan_pass in enumerate(scanner.passes(arguments.passes), start=1):
+            print_peaks(scanner, index, scan_pass)
+    finally:
+        for communicator in communicators:
+            print(communicator.acquisition.timings.report())
+    return
+
 def main(arguments, communicator, clean=False):
     """Runs the example
 
     Args:
      arguments (:py:class:`argparse.Namespace`): thing with parameters
      communicator (``Communicator``): holder of the RFECommunicator
+     clean (bool): if True, empty the sweep collections before scanning
     """
-    rf_explorer = communicator.rf_explorer
+    if arguments.offset is not None:
+        print("Ignoring --offset {} (the spans no longer have gaps between them)".format(
+            arguments.offset))
     try:
-        communicator.set_up()
-        #Control settings
-        SpanSize, StartFreq, StopFreq = check_settings(rf_explorer, arguments)
-        if(SpanSize and StartFreq and StopFreq):
-            #set new frequency range
-            print("Updating Device Configuration: {}, {}".format(StartFreq, StopFreq))
-            rf_explorer.UpdateDeviceConfig(StartFreq, StopFreq)
-            if clean:
-                rf_explorer.SweepData.CleanAll()
-            print("updated")
-            LastStartFreq = 0
-            nInd = 0
-            while (StopFreq<=arguments.scan_stop and StartFreq < StopFreq): 
-                #Process all received data from device 
-                print("Waiting for data")
-                while (rf_explorer.SweepData.Count < 1):
-                    rf_explorer.ProcessReceivedString(True)
-    
-                #Print data if received new sweep and a different start frequency 
-                if(StartFreq != LastStartFreq):
-                    nInd += 1
-                    print("Freq range[{}]: {} - {} MHz".format(nInd, StartFreq, StopFreq))
-                    print_peak(rf_explorer)
-                    LastFreqStart = StartFreq
-    
-                #set new frequency range
-                StartFreq = min((StopFreq + arguments.offset, arguments.scan_stop))
-                StopFreq = StartFreq + SpanSize
-
-                #Maximum stop/start frequency control
-                if (StartFreq < StopFreq and StopFreq<=arguments.scan_stop):
-                    print("Updating device config")
-                    rf_explorer.UpdateDeviceConfig(StartFreq, StopFreq)
-                    #Wait for new configuration to arrive (as it will clean up old sweep data)
-                    sweep_data = None
-                    print("Waiting for sweep_data update")
-                    while ((sweep_data is None) or sweep_data.StartFrequencyMHZ != StartFreq):
-                        if rf_explorer.SweepData.IsFull():
-                            print("Sweep Data Collection is Full")
-                        rf_explorer.ProcessReceivedString(True)
-                        if (rf_explorer.SweepData.Count > 0):
-                            sweep_data = rf_explorer.SweepData.GetData(rf_explorer.SweepData.Count-1)
-
+        if arguments.all_devices:
+            orchestrator = Orchestrator(
+                baud_rate=communicator.baud_rate,
+                settle_time=communicator.settle_time,
+                timeout=communicator.timeout,
+                adaptive_settle=communicator.adaptive_settle,
+                warm_start=communicator.session_cache is not None,
+                fast_parser=communicator.fast_parser)
+            with orchestrator:
+                orchestrator.set_up()
+                for port, error in orchestrator.failures.items():
+                    print("Unable to set up {}: {}".format(port, error))
+                scan(arguments, list(orchestrator.communicators.values()),
+                     communicator.timeout, clean)
+        else:
+            communicator.set_up()
+            scan(arguments, [communicator], communicator.timeout, clean)
     except Exception as error:
         print("Error: {}".format(error))
     return
@@ -138,14 +162,19 @@ def add_arguments(parser):
     )
     parser.add_argument(
         "--span-size", default=20, type=float,
-        help="Span of each measurement (default=%(default)s)")
+        help="Widest span for each measurement (default=%(default)s)")
     parser.add_argument(
         "--reset-time", default=3, type=float,
         help="Time to wait after sending the reset command (default=%(default)s)")
     parser.add_argument(
-        "--offset", default=5, type=int,
-        help="Amount to add to the last frequency in the range when finding the low-end for the next range (default=%(default)s)"
-    )
+        "--passes", default=1, type=int,
+        help="Number of times to scan the band (default=%(default)s)")
+    parser.add_argument(
+        "--all-devices", action="store_true",
+        help="Split the spans between every RF Explorer that's plugged in (ignores --serialport)")
+    parser.add_argument(
+        "--offset", default=None, type=int,
+        help="Ignored - the spans no longer have gaps between them (kept so old command lines still work)")
     return parser
 
 if __name__ == "__main__":
@@ -154,5 +183,9 @@ if __name__ == "__main__":
     arguments = parser.parse_args()
     with Communicator(arguments.serialport,
                       arguments.baud_rate,
-                      settle_time=arguments.reset_time) as communicator:
+                      settle_time=arguments.reset_time,
+                      timeout=arguments.timeout,
+                      adaptive_settle=arguments.adaptive_settle,
+                      warm_start=arguments.warm_start,
+                      fast_parser=arguments.fast_parser) as communicator:
         main(arguments, communicator)
@@ -6,6 +6,8 @@ from example_1 import (
     argument_parser,
     Communicator,
     )
+from reduction import Reducer, add_arguments as add_reduction_arguments
+from squelch import Squelch, add_arguments as add_squelch_arguments
 
 def main(arguments, communicator):
     """Runs the example
@@ -14,12 +16,13 @@ def main(arguments, communicator):
      arguments (argparse.Namespace): object with the settings
      communicator (Communicator): object with the RFECommunicator
     """
-    rf_explorer = communicator.rf_explorer
+    acquisition = communicator.acquisition
     try:
         communicator.set_up()
         print("Receiving data...")
         #Process until we complete scan time
-        last_index = 0
+        reducer = Reducer.from_arguments(arguments)
+        squelch = Squelch.from_arguments(arguments)
         start = datetime.now()
         total = timedelta(seconds=arguments.run_time)
         end = start + total
@@ -27,19 +30,36 @@ def main(arguments, communicator):
         if arguments.csv_data:
             print("index,frequency (MHz), amplitude (dBm)")
         while (datetime.now() < end):
-            #Process all received data from device 
-            rf_explorer.ProcessReceivedString(True)
+            #Wait for a new sweep (but not past the end of the run)
+            remaining = (end - datetime.now()).total_seconds()
+            sweeps = acquisition.new_sweeps(remaining)
             #Print data if received new sweep only
-            if (rf_explorer.SweepData.Count > last_index):
-                print(rf_explorer.SweepData.Dump())
-                last_index = rf_explorer.SweepData.Count          
+            for sweep in squelch.filter(reducer.extend(sweeps)):
+                print(sweep.Dump())
+        for sweep in squelch.filter(reducer.flush()):
+            print(sweep.Dump())
     except Exception as error:
         print("Error: {}".format(error))
     return
 
+def add_arguments(parser):
+    """adds the extra command-line arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with extra arguments
+    """
+    return add_squelch_arguments(add_reduction_arguments(parser))
+
 if __name__ == "__main__":
-    parser = argument_parser()
+    parser = add_arguments(argument_parser())
     arguments = parser.parse_args()
 
-    with Communicator(arguments.serialport, arguments.baud_rate) as communicator:        
+    with Communicator(arguments.serialport, arguments.baud_rate,
+                      timeout=arguments.timeout,
+                      adaptive_settle=arguments.adaptive_settle,
+                      warm_start=arguments.warm_start,
+                      fast_parser=arguments.fast_parser) as communicator:
         main(arguments, communicator)
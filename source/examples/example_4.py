@@ -11,6 +11,12 @@ from example_1 import (
     argument_parser,
     Communicator,
     )
+from csv_exporter import CSVExporter
+from journal import JournalWriter, add_arguments as add_journal_arguments
+from pipeline import PipelineExporter, add_arguments as add_pipeline_arguments
+from reduction import Reducer, add_arguments as add_reduction_arguments
+from telemetry import TelemetryReporter, add_arguments as add_telemetry_arguments
+from waterfall import Waterfall, add_arguments as add_waterfall_arguments, serve
 
 def main(arguments, communicator):
     """Runs the example
@@ -20,38 +26,77 @@ def main(arguments, communicator):
      communicator (Communicator): object with the RFECommunicator
     """
     rf_explorer = communicator.rf_explorer
+    acquisition = communicator.acquisition
     communicator.set_up()
     print("Receiving data...")
     #Process until we complete scan time
-    last_index = 0
+    exporter = CSVExporter(cursor_file=arguments.cursor_file)
+    if arguments.workers:
+        exporter = PipelineExporter(exporter, arguments.workers).start()
+    reducer = Reducer.from_arguments(arguments)
+    reporter = TelemetryReporter.from_arguments(
+        arguments, acquisition.telemetry).start()
+    journal = JournalWriter.from_arguments(arguments)
+    waterfall = server = None
+    if arguments.waterfall_port is not None or arguments.waterfall_file:
+        waterfall = Waterfall.from_arguments(arguments)
+    if arguments.waterfall_port is not None:
+        server = serve(waterfall, arguments.waterfall_port)
     start = datetime.now()
     total = timedelta(seconds=arguments.run_time)
     end = start + total
     
     if arguments.csv_data:
         print("index,frequency (MHz), amplitude (dBm)")
-    while (datetime.now() < end):
-        #Process all received data from device 
-        rf_explorer.ProcessReceivedString(True)
-        #Print data if received new sweep only
-        if (rf_explorer.SweepData.Count > last_index):
-            for index in range(rf_explorer.SweepData.Count):
-                data = rf_explorer.SweepData.GetData(index)
-                try:
-                    output = ','.join(("{:04.1f}".format(data.GetAmplitudeDBM(step, None, False))
-                                                         for step in range(data.TotalSteps)))
-                    print("{},{}".format(data.CaptureTime, output))
-                except TypeError as error:
-                    print(error)
-                    print("Index: {}".format(index))
-                    print("Data: {}".format(data))
-                    raise
-            last_index = rf_explorer.SweepData.Count          
+    try:
+        while (datetime.now() < end):
+            #Wait for a new sweep (but not past the end of the run)
+            remaining = (end - datetime.now()).total_seconds()
+            due = journal.due()
+            if due is not None:
+                remaining = min(remaining, due)
+            sweeps = acquisition.new_sweeps(remaining)
+            #Print data if received new sweeps only
+            journal.write(sweeps)
+            if waterfall is not None:
+                waterfall.extend(sweeps)
+            exporter.write(reducer.extend(sweeps))
+        exporter.write(reducer.flush())
+    finally:
+        if arguments.workers:
+            exporter.close()
+        reporter.stop()
+        if arguments.waterfall_file:
+            waterfall.save(arguments.waterfall_file)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        journal.close()
     return
 
+def add_arguments(parser):
+    """adds the extra command-line arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with extra arguments
+    """
+    parser.add_argument(
+        "--cursor-file", default=None, type=str,
+        help="File to save the time of the last sweep printed in (default=%(default)s)")
+    return add_waterfall_arguments(add_pipeline_arguments(add_journal_arguments(
+        add_telemetry_arguments(add_reduction_arguments(parser)))))
+
 if __name__ == "__main__":
     parser = argument_parser()
+    parser = add_arguments(parser)
     arguments = parser.parse_args()
 
-    with Communicator(arguments.serialport, arguments.baud_rate) as communicator:        
+    with Communicator(arguments.serialport, arguments.baud_rate,
+                      timeout=arguments.timeout,
+                      adaptive_settle=arguments.adaptive_settle,
+                      warm_start=arguments.warm_start,
+                      fast_parser=arguments.fast_parser) as communicator:
         main(arguments, communicator)
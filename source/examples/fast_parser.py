@@ -0,0 +1,339 @@
+# python standard library
+from datetime import datetime, timedelta
+import time
+
+# from pypi
+import numpy
+from RFExplorer import RFE_Common
+from RFExplorer.ReceiveSerialThread import ReceiveSerialThread
+from RFExplorer.RFEConfiguration import RFEConfiguration
+from RFExplorer.RFESweepData import RFESweepData
+from RFExplorer.RFESweepDataCollection import RFESweepDataCollection
+
+# this folder
+from sweep_arrays import AMPLITUDE_TYPE
+
+BLOCK_SWEEPS = 256
+MAXIMUM_BUFFER = 66 * 1024
+POLL_INTERVAL = 0.01
+LINE_END = b"\r\n"
+SWEEP_CODES = b"Ssz"
+MICROSECOND = timedelta(microseconds=1)
+
+class ArraySweep(RFESweepData):
+    """An RFESweepData that keeps its amplitudes in an array
+
+    Args:
+     start (float): the frequency (MHz) of the first step
+     step (float): the MHz between steps
+     amplitude (numpy.ndarray): the amplitude (dBm) of each step
+     capture_time (datetime): when the sweep was received
+    """
+    def __init__(self, start, step, amplitude, capture_time):
+        self.m_Time = capture_time
+        self.m_nTotalSteps = len(amplitude)
+        self.m_fStartFrequencyMHZ = start
+        self.m_fStepFrequencyMHZ = step
+        self.m_arrAmplitude = amplitude
+        self.m_arrBLOB = []
+        self.m_sBLOBString = ""
+        return
+
+    def GetPeakStep(self):
+        """Finds the step with the largest amplitude
+    
+        Returns:
+         int: the first step with the largest amplitude (0 if none are above the minimum)
+        """
+        step = int(numpy.argmax(self.m_arrAmplitude[:self.m_nTotalSteps]))
+        if self.m_arrAmplitude[step] > RFE_Common.CONST_MIN_AMPLITUDE_DBM:
+            return step
+        return 0
+
+    def GetMinStep(self):
+        """Finds the step with the smallest amplitude
+    
+        Returns:
+         int: the first step with the smallest amplitude (0 if none are below the maximum)
+        """
+        step = int(numpy.argmin(self.m_arrAmplitude[:self.m_nTotalSteps]))
+        if self.m_arrAmplitude[step] < RFE_Common.CONST_MAX_AMPLITUDE_DBM:
+            return step
+        return 0
+
+class ArraySweepCollection(RFESweepDataCollection):
+    """An RFESweepDataCollection that keeps its max-hold in an array"""
+
+    def Add(self, SweepData):
+        """Adds a sweep and updates the max-hold
+    
+        Args:
+         SweepData (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to add
+    
+        Returns:
+         bool: True if the sweep was added
+        """
+        if self.IsFull():
+            return False
+        steps = SweepData.TotalSteps
+        if not self.m_MaxHoldData:
+            self.m_MaxHoldData = ArraySweep(
+                SweepData.StartFrequencyMHZ, SweepData.StepFrequencyMHZ,
+                numpy.full(steps, RFE_Common.CONST_MIN_AMPLITUDE_DBM,
+                           dtype=AMPLITUDE_TYPE),
+                datetime.now())
+        if self.m_nUpperBound >= (len(self.m_arrData) - 1):
+            if self.m_bAutogrow:
+                self.ResizeCollection(10 * 1000)
+            else:
+                del self.m_arrData[0]
+                self.m_arrData.append(None)
+                self.m_nUpperBound -= 1
+        self.m_nUpperBound += 1
+        self.m_arrData[self.m_nUpperBound] = SweepData
+    
+        hold = self.m_MaxHoldData.m_arrAmplitude
+        steps = min(steps, len(hold))
+        numpy.maximum(hold[:steps], SweepData.m_arrAmplitude[:steps],
+                      out=hold[:steps])
+        return True
+
+class FastReceiveThread(ReceiveSerialThread):
+    """A receive-thread that decodes the sweeps in bulk
+
+    Args:
+     objRFECommunicator (:py:class:`RFExplorer.RFECommunicator`): the communicator it works for
+     objQueue (:py:class:`queue.Queue`): where to put what it receives
+     objSerialPort (:py:class:`serial.Serial`): the port to read
+     hQueueLock (:py:class:`threading.Lock`): lock for the queue
+     hSerialPortLock (:py:class:`threading.Lock`): lock for the serial port
+    """
+    def __init__(self, objRFECommunicator, objQueue, objSerialPort, hQueueLock,
+                 hSerialPortLock):
+        ReceiveSerialThread.__init__(self, objRFECommunicator, objQueue,
+                                     objSerialPort, hQueueLock, hSerialPortLock)
+        self.name = "fast-receive"
+        self.daemon = True
+        self._block = None
+        self._used = 0
+        self._last_capture = None
+        return
+
+    def put(self, *items):
+        """Puts the items on the queue
+    
+        Args:
+         items: the configurations, sweeps and strings to queue (in order)
+        """
+        with self.m_hQueueLock:
+            for item in items:
+                self.m_objQueue.put(item)
+        return
+
+    def rows(self, count, steps):
+        """Gets unused rows to decode sweeps into
+    
+        Args:
+         count (int): the number of rows
+         steps (int): the number of steps in each row
+    
+        Returns:
+         numpy.ndarray: (count x steps) view of the rows
+        """
+        if (self._block is None or self._block.shape[1] != steps
+                or self._used + count > len(self._block)):
+            self._block = numpy.empty((max(BLOCK_SWEEPS, count), steps),
+                                      dtype=AMPLITUDE_TYPE)
+            self._used = 0
+        rows = self._block[self._used:self._used + count]
+        self._used += count
+        return rows
+
+    def capture_times(self, count):
+        """Makes strictly increasing capture-times for the sweeps in a buffer
+    
+        Args:
+         count (int): the number of sweeps
+    
+        Returns:
+         list: a datetime for each sweep (all later than the last buffer's)
+        """
+        now = datetime.now()
+        last = self._last_capture
+        if last is None:
+            last = now - count * MICROSECOND
+        elif now - last < count * MICROSECOND:
+            now = last + count * MICROSECOND
+        gap = (now - last) / count
+        times = [last + gap * index for index in range(1, count + 1)]
+        self._last_capture = times[-1]
+        return times
+
+    def ReceiveThreadfunc(self):
+        """Reads the serial port and queues what it receives until told to stop"""
+        communicator = self.m_objRFECommunicator
+        while communicator.RunReceiveThread:
+            received = b""
+            while communicator.PortConnected and communicator.RunReceiveThread:
+                with self.m_hSerialPortLock:
+                    try:
+                        if self.m_objSerialPort.is_open:
+                            waiting = self.m_objSerialPort.in_waiting
+                            if waiting > 0:
+                                received += self.m_objSerialPort.read(waiting)
+                    except Exception as error:
+                        print("Serial port Exception: " + str(error))
+                if len(received) > MAXIMUM_BUFFER:
+                    received = b""
+                if len(received) > 1:
+                    received = received[self.parse(received):]
+                if communicator.Mode != RFE_Common.eMode.MODE_TRACKING:
+                    time.sleep(POLL_INTERVAL)
+            time.sleep(0.5)
+        return
+
+    def parse(self, buffer):
+        """Queues the complete messages at the start of the buffer
+    
+        Args:
+         buffer (bytes): what has been read from the serial port
+    
+        Returns:
+         int: the number of bytes that were used
+        """
+        position = 0
+        sweeps = []
+        while len(buffer) - position > 1:
+            first, code = buffer[position], buffer[position + 1]
+            if first == ord("$") and code in SWEEP_CODES:
+                header = 4 if code == ord("z") else 3
+                if len(buffer) - position < header:
+                    break
+                size = buffer[position + 2]
+                if code == ord("s"):
+                    size = 16 * (size or 256)
+                elif code == ord("z"):
+                    size = 256 * size + buffer[position + 3]
+                end = position + header + size
+                if len(buffer) < end + 2:
+                    break
+                if buffer[end:end + 2] != LINE_END:
+                    next_line = buffer.find(LINE_END, position)
+                    if next_line < 0:
+                        break
+                    position = next_line + 2
+                    continue
+                if size <= RFE_Common.CONST_MAX_SPECTRUM_STEPS:
+                    sweeps.append((position + header, size))
+                else:
+                    self.decode(buffer, sweeps)
+                    self.put("Ignored $S of size {}".format(size))
+                position = end + 2
+            elif first == ord("$") and code == ord("C"):
+                if len(buffer) - position < 5:
+                    break
+                size = 2
+                if buffer[position + 2] == ord("c"):
+                    size += int(chr(buffer[position + 3])) + 4
+                elif buffer[position + 2] == ord("b"):
+                    size += (int(chr(buffer[position + 4])) + 1) * 16 + 10
+                end = buffer.find(LINE_END, position)
+                if size == 2 or len(buffer) - position < size or end < 0:
+                    break
+                self.decode(buffer, sweeps)
+                self.put(buffer[position:end].decode("latin_1"))
+                position = end + 2
+            elif first == ord("$") and code in b"qQ":
+                size = 3 if code == ord("q") else 4
+                if len(buffer) - position < size:
+                    break
+                size += buffer[position + 2] + 2
+                if code == ord("Q"):
+                    size += 0x100 * buffer[position + 3]
+                if len(buffer) - position < size:
+                    break
+                self.decode(buffer, sweeps)
+                self.put(buffer[position:position + size].decode("latin_1"))
+                position += size
+            elif first == ord("$") and code == ord("D"):
+                break
+            else:
+                end = buffer.find(LINE_END, position)
+                if end < 0:
+                    break
+                self.decode(buffer, sweeps)
+                self.line(buffer[position:end].decode("latin_1"))
+                position = end + 2
+        self.decode(buffer, sweeps)
+        return position
+
+    def line(self, text):
+        """Queues a line
+    
+        Args:
+         text (str): the line (without the carriage-return newline)
+        """
+        if (text.startswith(("#C2-F:", "#C4-F:"))
+                or (text.startswith("#C3-") and text[4:5] != "M")):
+            configuration = RFEConfiguration(None)
+            if configuration.ProcessReceivedString(text):
+                self.m_objCurrentConfiguration = RFEConfiguration(configuration)
+                self.put(configuration)
+            return
+        self.put(text)
+        return
+
+    def decode(self, buffer, sweeps):
+        """Decodes and queues the sweeps
+    
+        Args:
+         buffer (bytes): what has been read from the serial port
+         sweeps (list): (position, size) of the amplitudes for each sweep
+        """
+        configuration = self.m_objCurrentConfiguration
+        if not sweeps or configuration is None:
+            del sweeps[:]
+            return
+        steps = configuration.nFreqSpectrumSteps
+        short = [(start, size) for start, size in sweeps if size < steps]
+        starts = numpy.array([start for start, size in sweeps if size >= steps],
+                             dtype=numpy.intp)
+        del sweeps[:]
+        if short:
+            self.put(*("$S" + buffer[start:start + size].decode("latin_1")
+                       for start, size in short))
+        if steps <= 5 or not len(starts):
+            return
+        raw = numpy.frombuffer(buffer, dtype=numpy.uint8)
+        rows = self.rows(len(starts), steps)
+        numpy.multiply(raw[starts[:, None] + numpy.arange(steps)], -0.5,
+                       out=rows, casting="unsafe")
+        rows += configuration.fOffset_dB
+        self.put(*(ArraySweep(configuration.fStartMHZ, configuration.fStepMHZ, row,
+                              capture_time)
+                   for row, capture_time in zip(rows, self.capture_times(len(rows)))))
+        return
+
+def install(rf_explorer):
+    """Replaces the RFECommunicator's receive-thread and sweep collection
+
+    Args:
+     rf_explorer (:py:class:`RFExplorer.RFECommunicator`): communicator that hasn't connected yet
+
+    Returns:
+     FastReceiveThread: the new receive-thread
+    """
+    if isinstance(rf_explorer.m_objThread, FastReceiveThread):
+        return rf_explorer.m_objThread
+    if rf_explorer.PortConnected:
+        raise RuntimeError("The fast parser has to be installed before connecting")
+    old_thread = rf_explorer.m_objThread
+    rf_explorer.RunReceiveThread = False
+    old_thread.join()
+    rf_explorer.RunReceiveThread = True
+    rf_explorer.m_SweepDataContainer = ArraySweepCollection(100 * 1024, True)
+    rf_explorer.m_objThread = FastReceiveThread(
+        rf_explorer, rf_explorer.m_objQueue, rf_explorer.m_objSerialPort,
+        rf_explorer.m_hQueueLock, rf_explorer.m_hSerialPortLock)
+    rf_explorer.m_objThread.start()
+    return rf_explorer.m_objThread
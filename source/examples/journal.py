@@ -0,0 +1,367 @@
+# python standard library
+from collections import namedtuple
+import glob
+import os
+import struct
+import time
+import zlib
+
+# from pypi
+import numpy
+
+# this folder
+from capture_file import CaptureHeader, HEADER_SIZE
+
+JOURNAL_MAGIC = b"RFEJRNL1"
+BATCH_MAGIC = b"RFEB"
+BATCH_HEADER = struct.Struct("<4sIII")
+SEGMENT_NAME = "segment-{:06d}"
+OPEN_EXTENSION = ".open"
+SEALED_EXTENSION = ".rfej"
+SEGMENT_HEADER_SIZE = len(JOURNAL_MAGIC) + HEADER_SIZE
+SYNC_INTERVAL = 1
+SEGMENT_BYTES = 64 * 2**20
+SEGMENT_SECONDS = 3600
+
+Recovery = namedtuple("Recovery", ["segments", "sweeps", "truncated", "last_time"])
+
+def segment_paths(directory, extensions=(SEALED_EXTENSION, OPEN_EXTENSION)):
+    """Finds the segments in the journal
+
+    Args:
+     directory (str): the journal's directory
+     extensions (tuple): the kinds of segments to find
+
+    Returns:
+     list: paths to the segments, oldest first
+    """
+    paths = []
+    for extension in extensions:
+        paths += glob.glob(os.path.join(directory, "segment-*" + extension))
+    return sorted(paths, key=os.path.basename)
+
+def sync_directory(directory):
+    """Flushes a directory's entries to the disk
+
+    Args:
+     directory (str): the directory to sync
+    """
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+    return
+
+def read_header(reader):
+    """Reads the header at the start of a segment
+
+    Args:
+     reader (file): the segment, opened for binary reading at the start
+
+    Returns:
+     :py:class:`capture_file.CaptureHeader`: the configuration of the segment's sweeps
+
+    Raises:
+     ValueError: the file isn't a journal segment
+    """
+    magic = reader.read(len(JOURNAL_MAGIC))
+    if magic != JOURNAL_MAGIC:
+        raise ValueError("Not a journal segment (magic={})".format(magic))
+    return CaptureHeader.unpack(reader.read(HEADER_SIZE))
+
+def batches(reader, header):
+    """Reads the good batches in a segment
+
+    Args:
+     reader (file): the segment, opened for binary reading just past its header
+     header (:py:class:`capture_file.CaptureHeader`): the segment's header
+
+    Yields:
+     tuple: the offset of the end of the batch and its records
+    """
+    while True:
+        data = reader.read(BATCH_HEADER.size)
+        if len(data) < BATCH_HEADER.size:
+            return
+        magic, count, size, checksum = BATCH_HEADER.unpack(data)
+        if magic != BATCH_MAGIC or size != count * header.dtype.itemsize:
+            return
+        payload = reader.read(size)
+        if len(payload) < size or zlib.crc32(payload) != checksum:
+            return
+        yield reader.tell(), numpy.frombuffer(payload, dtype=header.dtype)
+
+def recover(directory):
+    """Repairs and seals the segments that weren't closed
+
+    Args:
+     directory (str): the journal's directory
+
+    Returns:
+     Recovery: what it found
+    """
+    checked, kept, truncated, last_time = [], 0, 0, None
+    for path in segment_paths(directory, (OPEN_EXTENSION,)):
+        checked.append(path)
+        good = count = 0
+        with open(path, "r+b") as segment:
+            try:
+                header = read_header(segment)
+                good = SEGMENT_HEADER_SIZE
+                for good, records in batches(segment, header):
+                    count += len(records)
+                    last_time = records["capture_time"][-1]
+            except ValueError:
+                pass
+            size = segment.seek(0, os.SEEK_END)
+            truncated += size - good
+            segment.truncate(good)
+            segment.flush()
+            os.fsync(segment.fileno())
+        kept += count
+        if count:
+            os.replace(path, path[:-len(OPEN_EXTENSION)] + SEALED_EXTENSION)
+        else:
+            os.remove(path)
+    if checked:
+        sync_directory(directory)
+    if last_time is None:
+        last_time = Journal(directory).last_time()
+    return Recovery(checked, kept, truncated, last_time)
+
+class JournalWriter(object):
+    """Appends sweeps to a crash-safe journal
+
+    Args:
+     directory (str|None): where to put the segments (None means don't journal)
+     sync_interval (float): the most seconds between syncs
+     segment_bytes (int): start a new segment once one gets this big
+     segment_seconds (float): start a new segment once one covers this many seconds
+     amplitude_type (str): 'float32' or 'uint8'
+    """
+    def __init__(self, directory, sync_interval=SYNC_INTERVAL,
+                 segment_bytes=SEGMENT_BYTES, segment_seconds=SEGMENT_SECONDS,
+                 amplitude_type="float32"):
+        self.directory = directory
+        self.sync_interval = sync_interval
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = numpy.timedelta64(int(segment_seconds * 10**6), "us")
+        self.amplitude_type = amplitude_type
+        self.header = None
+        self.path = None
+        self.started = None
+        self.size = 0
+        self.syncs = 0
+        self.recovered = None
+        self.number = 0
+        self._file = None
+        self._pending = []
+        self._synced = time.monotonic()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.recovered = recover(directory)
+            paths = segment_paths(directory)
+            if paths:
+                self.number = int(os.path.basename(paths[-1])[8:14]) + 1
+        return
+
+    @classmethod
+    def from_arguments(cls, arguments):
+        """Builds the writer from the command-line arguments
+    
+        Args:
+         arguments (argparse.Namespace): the parsed arguments
+    
+        Returns:
+         JournalWriter: writer with the settings from the arguments
+        """
+        return cls(arguments.journal, sync_interval=arguments.journal_sync,
+                   segment_bytes=int(arguments.journal_megabytes * 2**20),
+                   segment_seconds=arguments.journal_seconds)
+
+    def __enter__(self):
+        """returns this object"""
+        return self
+    
+    def __exit__(self, type, value, traceback):
+        """seals the segment"""
+        self.close()
+        return
+
+    def open_segment(self, sweep):
+        """Starts a new segment
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the first sweep for the segment
+        """
+        self.header = CaptureHeader.from_sweep(sweep, self.amplitude_type)
+        self.path = os.path.join(self.directory,
+                                 SEGMENT_NAME.format(self.number) + OPEN_EXTENSION)
+        self.number += 1
+        self.started = numpy.datetime64(sweep.CaptureTime, "us")
+        self._file = open(self.path, "wb")
+        self._file.write(JOURNAL_MAGIC + self.header.pack())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        sync_directory(self.directory)
+        self.size = SEGMENT_HEADER_SIZE
+        return
+
+    def is_new_segment(self, sweep):
+        """Checks if the sweep has to go in a new segment
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the next sweep
+    
+        Returns:
+         bool: True if the current segment should be sealed first
+        """
+        if self._file is None:
+            return True
+        size = self.size + len(self._pending) * self.header.dtype.itemsize
+        return (not self.header.matches(sweep)
+                or size >= self.segment_bytes
+                or numpy.datetime64(sweep.CaptureTime, "us") - self.started
+                >= self.segment_seconds)
+
+    def write(self, sweeps):
+        """Adds the sweeps to the journal
+    
+        Args:
+         sweeps (list): the :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to add
+    
+        Returns:
+         int: the number of sweeps added
+        """
+        if self.directory is None:
+            return 0
+        for sweep in sweeps:
+            if self.is_new_segment(sweep):
+                self.seal()
+                self.open_segment(sweep)
+            self._pending.append(sweep)
+        if time.monotonic() - self._synced >= self.sync_interval:
+            self.commit()
+        return len(sweeps)
+
+    def due(self):
+        """Gets the seconds until the waiting sweeps should be committed
+    
+        Returns:
+         float|None: seconds until the next sync (None if no sweeps are waiting)
+        """
+        if not self._pending:
+            return None
+        return max(0, self.sync_interval - (time.monotonic() - self._synced))
+
+    def commit(self):
+        """Writes and syncs the waiting sweeps"""
+        self._synced = time.monotonic()
+        if not self._pending:
+            return
+        payload = self.header.records(self._pending).tobytes()
+        self._file.write(BATCH_HEADER.pack(BATCH_MAGIC, len(self._pending),
+                                           len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.size += BATCH_HEADER.size + len(payload)
+        self.syncs += 1
+        self._pending = []
+        return
+
+    def seal(self):
+        """Commits the waiting sweeps and finishes the segment"""
+        if self._file is None:
+            return
+        self.commit()
+        self._file.close()
+        self._file = None
+        os.replace(self.path, self.path[:-len(OPEN_EXTENSION)] + SEALED_EXTENSION)
+        sync_directory(self.directory)
+        return
+
+    def close(self):
+        """Seals the segment"""
+        self.seal()
+        return
+
+class Journal(object):
+    """Reads the sweeps in a journal
+
+    Args:
+     directory (str): the journal's directory
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        return
+
+    def segments(self):
+        """The segments, oldest first
+    
+        Returns:
+         list: paths to the sealed and open segments
+        """
+        return segment_paths(self.directory)
+
+    def read(self, path):
+        """Reads the sweeps in one segment
+    
+        Args:
+         path (str): the segment
+    
+        Returns:
+         tuple: the segment's :py:class:`capture_file.CaptureHeader` and its records
+        """
+        with open(path, "rb") as reader:
+            header = read_header(reader)
+            found = [records for end, records in batches(reader, header)]
+        if not found:
+            return header, numpy.empty(0, dtype=header.dtype)
+        return header, numpy.concatenate(found)
+
+    def records(self):
+        """Reads the segments in order
+    
+        Yields:
+         tuple: each segment's :py:class:`capture_file.CaptureHeader` and its records
+        """
+        for path in self.segments():
+            yield self.read(path)
+        return
+
+    def last_time(self):
+        """Finds the time of the last sweep in the journal
+    
+        Returns:
+         numpy.datetime64|None: the capture time of the last good sweep
+        """
+        for path in reversed(self.segments()):
+            header, records = self.read(path)
+            if len(records):
+                return records["capture_time"][-1]
+        return None
+
+def add_arguments(parser):
+    """adds the journal arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with the journal arguments
+    """
+    parser.add_argument(
+        "--journal", default=None, type=str,
+        help="Directory to journal the sweeps in (default=%(default)s)")
+    parser.add_argument(
+        "--journal-sync", default=SYNC_INTERVAL, type=float,
+        help="Most seconds between syncing the journal (default=%(default)s)")
+    parser.add_argument(
+        "--journal-megabytes", default=SEGMENT_BYTES // 2**20, type=float,
+        help="Start a new journal segment after this many MB (default=%(default)s)")
+    parser.add_argument(
+        "--journal-seconds", default=SEGMENT_SECONDS, type=float,
+        help="Start a new journal segment after this many seconds (default=%(default)s)")
+    return parser
@@ -0,0 +1,183 @@
+# python standard library
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import heapq
+import queue
+import threading
+
+# from pypi
+import RFExplorer
+
+# this folder
+from example_1 import Communicator, CommunicatorException
+
+TaggedSweep = namedtuple("TaggedSweep", ["capture_time", "port", "sweep"])
+
+def discover_ports():
+    """Finds the serial ports that might have RF Explorers on them
+
+    Returns:
+     list: port-info objects (the ``device`` attribute is the name of the port)
+    """
+    rf_explorer = RFExplorer.RFECommunicator()
+    try:
+        rf_explorer.GetConnectedPorts()
+        ports = list(rf_explorer.m_arrValidCP2102Ports)
+    finally:
+        rf_explorer.Close()
+    return ports
+
+class Orchestrator(object):
+    """Sets up and reads from more than one RF Explorer at once
+
+    Args:
+     serial_ports (list|None): names of the ports to use (None means all that are found)
+     baud_rate (int): the signaling rate for the serial connections
+     settle_time (float): Seconds to wait after resetting
+     timeout (float|None): Seconds to wait for each device (None means forever)
+     poll_interval (float): Seconds the readers wait before checking if they should stop
+     adaptive_settle (bool): Stop settling once each device goes quiet after resetting
+     warm_start (bool): Skip the reset for devices that match the session cache
+     fast_parser (bool): Decode the sweeps in bulk instead of with the RFExplorer parser
+    """
+    def __init__(self, serial_ports=None, baud_rate=500000, settle_time=3,
+                 timeout=10, poll_interval=0.5, adaptive_settle=False,
+                 warm_start=False, fast_parser=False):
+        self.serial_ports = serial_ports
+        self.baud_rate = baud_rate
+        self.settle_time = settle_time
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.adaptive_settle = adaptive_settle
+        self.warm_start = warm_start
+        self.fast_parser = fast_parser
+        self.communicators = {}
+        self.failures = {}
+        self.queue = queue.Queue()
+        self.readers = []
+        self._stop = threading.Event()
+        return
+
+    def __enter__(self):
+        """returns this object"""
+        return self
+    
+    def __exit__(self, type, value, traceback):
+        """closes all the communicators"""
+        self.close()
+        return
+
+    def set_up(self):
+        """Connects to and initializes all the RF Explorers
+    
+        Raises:
+         CommunicatorException: none of the RF Explorers could be set up
+        """
+        ports = discover_ports()
+        if self.serial_ports is not None:
+            ports = [port for port in ports if port.device in self.serial_ports]
+        connected = {}
+        for port in ports:
+            communicator = Communicator(port.device, self.baud_rate,
+                                        settle_time=self.settle_time,
+                                        timeout=self.timeout,
+                                        adaptive_settle=self.adaptive_settle,
+                                        warm_start=self.warm_start,
+                                        fast_parser=self.fast_parser)
+            try:
+                communicator.connect(ports)
+                connected[port.device] = communicator
+            except CommunicatorException as error:
+                self.failures[port.device] = error
+                communicator.close()
+    
+        with ThreadPoolExecutor(max_workers=max(1, len(connected))) as executor:
+            futures = {device: executor.submit(communicator.initialize)
+                       for device, communicator in connected.items()}
+    
+        for device, future in futures.items():
+            error = future.exception()
+            if error is None:
+                self.communicators[device] = connected[device]
+            else:
+                self.failures[device] = error
+                connected[device].close()
+    
+        if not self.communicators:
+            raise CommunicatorException(
+                "Unable to set up any RF Explorers: {}".format(self.failures))
+        return
+
+    def read(self, port):
+        """Puts the sweeps from one RF Explorer on the queue until told to stop
+    
+        Args:
+         port (str): the name of the port for the RF Explorer to read
+        """
+        acquisition = self.communicators[port].acquisition
+        try:
+            while not self._stop.is_set():
+                started = datetime.now()
+                sweeps = acquisition.new_sweeps(self.poll_interval)
+                if not sweeps:
+                    self.queue.put(TaggedSweep(started, port, None))
+                for sweep in sweeps:
+                    self.queue.put(TaggedSweep(sweep.CaptureTime, port, sweep))
+        except Exception as error:
+            self.failures[port] = error
+        finally:
+            self.queue.put(TaggedSweep(datetime.max, port, None))
+        return
+
+    def start(self):
+        """Starts a reader thread for each RF Explorer"""
+        if self.readers:
+            return
+        self._stop.clear()
+        for port in self.communicators:
+            reader = threading.Thread(target=self.read, args=(port,),
+                                      name="reader-{}".format(port), daemon=True)
+            reader.start()
+            self.readers.append(reader)
+        return
+
+    def sweeps(self):
+        """Yields the sweeps from all the RF Explorers in the order they were captured
+    
+        Yields:
+         TaggedSweep: the capture-time, port and sweep
+        """
+        self.start()
+        watermarks = dict.fromkeys(self.communicators)
+        pending = []
+        count = 0
+        while True:
+            try:
+                tagged = self.queue.get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+            watermarks[tagged.port] = tagged.capture_time
+            if tagged.sweep is not None:
+                heapq.heappush(pending, (tagged.capture_time, count, tagged))
+                count += 1
+            if None in watermarks.values():
+                continue
+            low = min(watermarks.values())
+            while pending and pending[0][0] <= low:
+                yield heapq.heappop(pending)[-1]
+            if low == datetime.max:
+                return
+
+    def close(self):
+        """Stops the readers and closes all the communicators"""
+        self._stop.set()
+        for reader in self.readers:
+            reader.join()
+        self.readers = []
+        if self.communicators:
+            with ThreadPoolExecutor(max_workers=len(self.communicators)) as executor:
+                for communicator in self.communicators.values():
+                    executor.submit(communicator.close)
+        self.communicators = {}
+        return
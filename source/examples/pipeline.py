@@ -0,0 +1,380 @@
+# python standard library
+from collections import namedtuple
+from multiprocessing import shared_memory
+import heapq
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+# from pypi
+import numpy
+
+# this folder
+from csv_exporter import TimestampCache, format_amplitudes
+from sweep_arrays import AMPLITUDE_TYPE, frequency_steps
+
+START_METHOD = "spawn"
+MAXIMUM_STEPS = 4096
+COLLECTION_SIZE = 1024
+TIMESTAMPS = TimestampCache()
+
+SweepFrame = namedtuple("SweepFrame", ["capture_time", "start_frequency",
+                                       "step_frequency", "amplitude"])
+
+Result = namedtuple("Result", ["sequence", "capture_time", "value", "error"])
+
+def peak(frame):
+    """Finds the strongest point in the sweep
+
+    Args:
+     frame (SweepFrame): the sweep
+
+    Returns:
+     tuple: frequency (MHz) and amplitude (dBm) of the peak
+    """
+    step = int(frame.amplitude.argmax())
+    frequency = frequency_steps(frame.start_frequency, frame.step_frequency,
+                                len(frame.amplitude))
+    return float(frequency[step]), float(frame.amplitude[step])
+
+def csv_line(frame):
+    """Formats the sweep the same way the CSVExporter does
+
+    Args:
+     frame (SweepFrame): the sweep
+
+    Returns:
+     str: capture-time followed by the amplitudes (with a newline)
+    """
+    text = format_amplitudes(frame.amplitude.astype(numpy.float64)[numpy.newaxis])[0]
+    return "{},{}\n".format(TIMESTAMPS(frame.capture_time), text)
+
+def work(name, slots, maximum_steps, analyze, tasks, results, free):
+    """Runs the analysis on the sweeps in the shared memory
+
+    Args:
+     name (str): name of the shared memory block
+     slots (int): number of sweeps the shared memory holds
+     maximum_steps (int): the steps in each slot
+     analyze (callable): function that takes a SweepFrame
+     tasks (multiprocessing.Queue): where the sweeps to analyze come from
+     results (multiprocessing.Queue): where to put the results
+     free (multiprocessing.Queue): where to put the slots once they're copied
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        amplitudes = numpy.ndarray((slots, maximum_steps), dtype=AMPLITUDE_TYPE,
+                                   buffer=memory.buf)
+        results.put(None)
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            sequence, slot, steps, start, step, capture_time = task
+            amplitude = amplitudes[slot, :steps].copy()
+            free.put(slot)
+            try:
+                value = analyze(SweepFrame(capture_time, start, step, amplitude))
+                results.put(Result(sequence, capture_time, value, None))
+            except Exception as error:
+                results.put(Result(sequence, capture_time, None, error))
+        del amplitudes
+    finally:
+        memory.close()
+    return
+
+class Pipeline(object):
+    """Runs the analysis of the sweeps in worker processes
+
+    Args:
+     analyze (callable): importable function that takes a SweepFrame
+     workers (int|None): number of worker processes (None means one less than the CPUs)
+     slots (int): number of sweeps that can wait in the shared memory
+     maximum_steps (int): the most steps a sweep can have
+     poll_interval (float): Seconds to wait before checking if it should stop
+     start_timeout (float): Seconds to wait for the workers to be ready
+    """
+    def __init__(self, analyze, workers=None, slots=256,
+                 maximum_steps=MAXIMUM_STEPS, poll_interval=0.5, start_timeout=30):
+        self.analyze = analyze
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)
+        self.workers = workers
+        self.slots = slots
+        self.maximum_steps = maximum_steps
+        self.poll_interval = poll_interval
+        self.start_timeout = start_timeout
+        self.submitted = 0
+        self.dropped = 0
+        self.processes = []
+        self._context = multiprocessing.get_context(START_METHOD)
+        self._memory = None
+        self._amplitudes = None
+        self._tasks = None
+        self._results = None
+        self._free = None
+        self._reader = None
+        self._stop = threading.Event()
+        self._next = 0
+        return
+
+    def __enter__(self):
+        """Starts the workers
+    
+        Returns:
+         Pipeline: this object
+        """
+        self.start()
+        return self
+    
+    def __exit__(self, type, value, traceback):
+        """Stops the workers and frees the shared memory"""
+        self.close()
+        return
+
+    def start(self):
+        """Creates the shared memory and starts the workers
+    
+        Raises:
+         RuntimeError: the workers weren't all ready within the start_timeout
+        """
+        if self.processes:
+            return
+        size = self.slots * self.maximum_steps * numpy.dtype(AMPLITUDE_TYPE).itemsize
+        self._memory = shared_memory.SharedMemory(create=True, size=size)
+        self._amplitudes = numpy.ndarray((self.slots, self.maximum_steps),
+                                         dtype=AMPLITUDE_TYPE, buffer=self._memory.buf)
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        self._free = self._context.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=work, name="pipeline-worker-{}".format(index),
+                args=(self._memory.name, self.slots, self.maximum_steps,
+                      self.analyze, self._tasks, self._results, self._free),
+                daemon=True)
+            process.start()
+            self.processes.append(process)
+        self._stop.clear()
+    
+        deadline = time.monotonic() + self.start_timeout
+        ready = 0
+        while ready < self.workers:
+            remaining = deadline - time.monotonic()
+            if (remaining <= 0
+                    or not all(process.is_alive() for process in self.processes)):
+                self.close()
+                raise RuntimeError("Only {} of {} pipeline workers started".format(
+                    ready, self.workers))
+            try:
+                self._results.get(timeout=min(remaining, self.poll_interval))
+            except queue.Empty:
+                continue
+            ready += 1
+        return
+
+    def submit(self, sweep):
+        """Hands a sweep to the workers
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to analyze
+    
+        Returns:
+         bool: False if there was no free slot so the sweep was dropped
+        """
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        steps = min(sweep.TotalSteps, self.maximum_steps)
+        self._amplitudes[slot, :steps] = sweep.m_arrAmplitude[:steps]
+        self._tasks.put((self.submitted, slot, steps, sweep.StartFrequencyMHZ,
+                         sweep.StepFrequencyMHZ, sweep.CaptureTime))
+        self.submitted += 1
+        return True
+
+    def read(self, acquisition):
+        """Submits the new sweeps until told to stop
+    
+        Args:
+         acquisition (:py:class:`acquisition.Acquisition`): waiter for the RFECommunicator
+        """
+        while not self._stop.is_set():
+            for sweep in acquisition.new_sweeps(self.poll_interval):
+                self.submit(sweep)
+        return
+
+    def feed(self, acquisition):
+        """Starts a reader thread that submits the sweeps from the RF Explorer
+    
+        Args:
+         acquisition (:py:class:`acquisition.Acquisition`): waiter for the RFECommunicator
+        """
+        self.start()
+        self._reader = threading.Thread(target=self.read, args=(acquisition,),
+                                        name="pipeline-reader", daemon=True)
+        self._reader.start()
+        return
+
+    def batches(self):
+        """Yields the results that are ready, in the order the sweeps were submitted
+    
+        Yields:
+         list: :py:class:`Result` tuples (never empty)
+        """
+        pending = []
+        while not (self._stop.is_set() and self._next == self.submitted):
+            try:
+                result = self._results.get(timeout=self.poll_interval)
+                while True:
+                    heapq.heappush(pending, (result.sequence, result))
+                    result = self._results.get_nowait()
+            except queue.Empty:
+                pass
+            batch = []
+            while pending and pending[0][0] == self._next:
+                batch.append(heapq.heappop(pending)[-1])
+                self._next += 1
+            if batch:
+                yield batch
+            for process in self.processes:
+                if process.exitcode is not None:
+                    raise RuntimeError(
+                        "{} exited (exitcode={}) with {} sweeps unfinished".format(
+                            process.name, process.exitcode,
+                            self.submitted - self._next))
+        return
+
+    def results(self):
+        """Yields the results in the order the sweeps were submitted
+    
+        Yields:
+         Result: the sequence number, capture-time, and what the analysis returned
+        """
+        for batch in self.batches():
+            yield from batch
+        return
+
+    def stop(self):
+        """Stops submitting sweeps"""
+        self._stop.set()
+        if self._reader is not None:
+            self._reader.join()
+            self._reader = None
+        return
+
+    def close(self):
+        """Stops the reader and workers and frees the shared memory"""
+        self.stop()
+        for process in self.processes:
+            self._tasks.put(None)
+        for process in self.processes:
+            while process.is_alive():
+                if any(worker.exitcode for worker in self.processes):
+                    process.terminate()
+                try:
+                    self._results.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    pass
+                process.join(0)
+        self.processes = []
+        if self._memory is not None:
+            self._amplitudes = None
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+        return
+
+class PipelineExporter(object):
+    """Formats the sweeps for a CSVExporter in worker processes
+
+    Args:
+     exporter (:py:class:`csv_exporter.CSVExporter`): writes the lines and keeps the cursor
+     workers (int|None): number of worker processes (None means one less than the CPUs)
+     slots (int): number of sweeps that can wait in the shared memory
+    """
+    def __init__(self, exporter, workers=None, slots=COLLECTION_SIZE):
+        self.exporter = exporter
+        self.pipeline = Pipeline(csv_line, workers=workers, slots=slots)
+        self.error = None
+        self._writer = None
+        return
+
+    def start(self):
+        """Starts the workers and the thread that writes their lines
+    
+        Returns:
+         PipelineExporter: this object
+        """
+        self.pipeline.start()
+        self._writer = threading.Thread(target=self.write_results,
+                                        name="pipeline-writer", daemon=True)
+        self._writer.start()
+        return self
+
+    def write(self, sweeps):
+        """Hands the sweeps captured after the last one written to the workers
+    
+        Args:
+         sweeps (list): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects in capture order
+    
+        Returns:
+         int: the number of sweeps handed to the workers (the rest were dropped)
+    
+        Raises:
+         RuntimeError: the writer stopped because one of the workers died
+        """
+        if self.error is not None:
+            raise self.error
+        submitted = 0
+        for sweep in self.exporter.unwritten(sweeps):
+            submitted += self.pipeline.submit(sweep)
+        return submitted
+
+    def write_results(self):
+        """Writes the workers' lines in the order the sweeps were submitted"""
+        try:
+            for batch in self.pipeline.batches():
+                lines = []
+                for result in batch:
+                    if result.error is None:
+                        lines.append(result.value)
+                        last_capture = result.capture_time
+                    else:
+                        print("Unable to format the sweep captured at {}: {}".format(
+                            result.capture_time, result.error), file=sys.stderr)
+                if lines:
+                    self.exporter.write_lines(lines, last_capture)
+        except RuntimeError as error:
+            print("Error: {}".format(error), file=sys.stderr)
+            self.error = error
+        return
+
+    def close(self):
+        """Writes what the workers have left and stops them"""
+        self.pipeline.stop()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.pipeline.close()
+        return
+
+def add_arguments(parser):
+    """adds the pipeline arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with the pipeline arguments
+    """
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="Processes to format the sweeps in (0 formats them in the reading thread, default=%(default)s)")
+    return parser
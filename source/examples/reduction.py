@@ -0,0 +1,231 @@
+# python standard library
+from datetime import timedelta
+
+# from pypi
+import numpy
+from RFExplorer.RFESweepData import RFESweepData
+
+# this folder
+from sweep_arrays import amplitudes
+
+REDUCTIONS = {"max": numpy.maximum, "mean": numpy.add, "min": numpy.minimum}
+STATISTICS = tuple(REDUCTIONS)
+TOLERANCE = 0.001
+
+def bin_edges(step, steps, width=None):
+    """Finds the first step in each frequency bin
+
+    Args:
+     step (float): the MHz between steps
+     steps (int): the number of steps in the sweep
+     width (float|None): MHz per bin (None means no binning)
+
+    Returns:
+     numpy.ndarray: index of the first step in each bin
+    """
+    if width is None or width <= step:
+        return numpy.arange(steps)
+    bins = numpy.floor(numpy.arange(steps) * step / width + TOLERANCE / width)
+    return numpy.flatnonzero(numpy.diff(bins, prepend=-1))
+
+class Reducer(object):
+    """Combines sweeps over time and neighboring steps into frequency bins
+
+    Args:
+     count (int|None): number of sweeps to combine into one
+     interval (float|None): seconds of sweeps to combine into one (if no count)
+     statistic (str): how to combine the amplitudes ("max", "mean" or "min")
+     bin_width (float|None): MHz per frequency bin (None means no binning)
+
+    Raises:
+     ValueError: the statistic isn't one of the STATISTICS
+    """
+    def __init__(self, count=None, interval=None, statistic="max", bin_width=None):
+        if statistic not in REDUCTIONS:
+            raise ValueError("Statistic must be one of {}, not {}".format(
+                STATISTICS, statistic))
+        if count is None and interval is None:
+            count = 1
+        self.count = count
+        self.interval = interval
+        self.statistic = statistic
+        self.bin_width = bin_width
+        self.sweeps_in = 0
+        self.sweeps_out = 0
+        self.values_in = 0
+        self.values_out = 0
+        self._reduction = REDUCTIONS[statistic]
+        self._configuration = None
+        self._edges = None
+        self._bin_sizes = None
+        self._group = None
+        self._grouped = 0
+        self._first_capture = None
+        return
+
+    @classmethod
+    def from_arguments(cls, arguments):
+        """Builds the reducer from the command-line arguments
+    
+        Args:
+         arguments (argparse.Namespace): the parsed arguments
+    
+        Returns:
+         Reducer: reducer with the settings from the arguments
+        """
+        return cls(count=arguments.decimate, interval=arguments.decimate_interval,
+                   statistic=arguments.statistic, bin_width=arguments.bin_width)
+
+    def is_same_configuration(self, sweep):
+        """Checks if the sweep has the same frequencies as the group
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to check
+    
+        Returns:
+         bool: True if the sweep can be combined with the group
+        """
+        if self._configuration is None:
+            return False
+        start, step, steps = self._configuration
+        return (sweep.TotalSteps == steps
+                and abs(sweep.StartFrequencyMHZ - start) < TOLERANCE
+                and abs(sweep.StepFrequencyMHZ - step) < TOLERANCE)
+
+    def is_due(self, sweep):
+        """Checks if the sweep is past the end of the group's interval
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the next sweep
+    
+        Returns:
+         bool: True if the group should be flushed before adding the sweep
+        """
+        return (self.count is None and self._first_capture is not None
+                and (sweep.CaptureTime - self._first_capture
+                     >= timedelta(seconds=self.interval)))
+
+    def bin(self, sweep):
+        """Combines the sweep's amplitudes into the frequency bins
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to bin
+    
+        Returns:
+         numpy.ndarray: an amplitude (dBm) for each bin
+        """
+        amplitude = amplitudes(sweep).astype(numpy.float64)
+        if len(self._edges) == len(amplitude):
+            return amplitude
+        binned = self._reduction.reduceat(amplitude, self._edges)
+        if self.statistic == "mean":
+            binned /= self._bin_sizes
+        return binned
+
+    def add(self, sweep):
+        """Adds a sweep to the group
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the new sweep
+    
+        Returns:
+         list: the reduced sweeps that are finished (may be empty)
+        """
+        reduced = []
+        if self._group is not None and (not self.is_same_configuration(sweep)
+                                        or self.is_due(sweep)):
+            reduced.extend(self.flush())
+        if not self.is_same_configuration(sweep):
+            self._configuration = (sweep.StartFrequencyMHZ, sweep.StepFrequencyMHZ,
+                                   sweep.TotalSteps)
+            self._edges = bin_edges(sweep.StepFrequencyMHZ, sweep.TotalSteps,
+                                    self.bin_width)
+            self._bin_sizes = numpy.diff(self._edges, append=sweep.TotalSteps)
+    
+        binned = self.bin(sweep)
+        if self._group is None:
+            self._group = binned
+            self._first_capture = sweep.CaptureTime
+        elif self.statistic == "mean":
+            self._group += binned
+        else:
+            self._reduction(self._group, binned, out=self._group)
+        self._grouped += 1
+        self.sweeps_in += 1
+        self.values_in += sweep.TotalSteps
+    
+        if self.count is not None and self._grouped >= self.count:
+            reduced.extend(self.flush())
+        return reduced
+
+    def extend(self, sweeps):
+        """Adds the sweeps in order
+    
+        Args:
+         sweeps (iterable): the :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to add
+    
+        Returns:
+         list: the reduced sweeps that are finished
+        """
+        reduced = []
+        for sweep in sweeps:
+            reduced.extend(self.add(sweep))
+        return reduced
+
+    def flush(self):
+        """Finishes the current group
+    
+        Returns:
+         list: the reduced sweep (empty if there was nothing in the group)
+        """
+        if self._group is None:
+            return []
+        start, step, steps = self._configuration
+        if len(self._edges) < steps:
+            step = self.bin_width
+        amplitude = self._group
+        if self.statistic == "mean":
+            amplitude = amplitude / self._grouped
+        sweep = RFESweepData(start, step, len(amplitude))
+        sweep.m_arrAmplitude = amplitude.tolist()
+        sweep.CaptureTime = self._first_capture
+        self._group = None
+        self._grouped = 0
+        self._first_capture = None
+        self.sweeps_out += 1
+        self.values_out += len(amplitude)
+        return [sweep]
+
+    @property
+    def ratio(self):
+        """How many amplitudes went in for each one that came out
+    
+        Returns:
+         float|None: amplitudes in over amplitudes out (None if nothing's come out)
+        """
+        if not self.values_out:
+            return None
+        return self.values_in / self.values_out
+
+def add_arguments(parser):
+    """adds the reduction arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with the reduction arguments
+    """
+    parser.add_argument(
+        "--decimate", type=int, default=None,
+        help="Number of sweeps to combine into one (default=%(default)s)")
+    parser.add_argument(
+        "--decimate-interval", type=float, default=None,
+        help="Seconds of sweeps to combine into one (default=%(default)s)")
+    parser.add_argument(
+        "--statistic", choices=STATISTICS, default="max",
+        help="How to combine the amplitudes (default=%(default)s)")
+    parser.add_argument(
+        "--bin-width", type=float, default=None,
+        help="MHz per frequency bin (default=%(default)s)")
+    return parser
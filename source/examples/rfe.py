@@ -0,0 +1,83 @@
+# python standard library
+from collections import namedtuple
+import argparse
+import importlib
+
+Command = namedtuple("Command", ["module", "help"])
+
+COMMANDS = {
+    "peak": Command("example_1", "print the peak of each sweep"),
+    "scan": Command("example_2", "scan a band in spans (can use every device)"),
+    "dump": Command("example_3", "dump each sweep"),
+    "csv": Command("example_4", "print each sweep as CSV"),
+}
+DEFAULT_SETTLE = 3
+
+def argument_parser():
+    """Builds the parser that picks the command
+
+    Returns:
+     ArgumentParser: object to parse the command-line
+    """
+    parser = argparse.ArgumentParser(
+        "rfe", description="Get data from an RF Explorer",
+        epilog="Use 'rfe <command> --help' to see the options for a command.")
+    parser.add_argument(
+        "command", choices=list(COMMANDS), metavar="command",
+        help="one of: " + ", ".join(
+            "{} ({})".format(name, command.help)
+            for name, command in COMMANDS.items()))
+    parser.add_argument(
+        "arguments", nargs=argparse.REMAINDER,
+        help="options for the command")
+    return parser
+
+def command_parser(name):
+    """Imports a command's module and builds its parser
+
+    Args:
+     name (str): the command (a key in COMMANDS)
+
+    Returns:
+     tuple: the module and its ArgumentParser
+    """
+    command = COMMANDS[name]
+    module = importlib.import_module(command.module)
+    parser = module.argument_parser()
+    add_arguments = getattr(module, "add_arguments", None)
+    if add_arguments is not None:
+        parser = add_arguments(parser)
+    parser.prog = "rfe {}".format(name)
+    parser.description = command.help
+    return module, parser
+
+def run(module, arguments):
+    """Runs a command
+
+    Args:
+     module: the command's module (it has to have a ``main(arguments, communicator)``)
+     arguments (argparse.Namespace): the command's settings
+    """
+    from example_1 import Communicator
+    with Communicator(arguments.serialport, arguments.baud_rate,
+                      settle_time=getattr(arguments, "reset_time", DEFAULT_SETTLE),
+                      timeout=arguments.timeout,
+                      adaptive_settle=arguments.adaptive_settle,
+                      warm_start=arguments.warm_start,
+                      fast_parser=arguments.fast_parser) as communicator:
+        module.main(arguments, communicator)
+    return
+
+def main(command_line=None):
+    """Parses the command-line and runs the command
+
+    Args:
+     command_line (list|None): the arguments (None means use sys.argv)
+    """
+    arguments = argument_parser().parse_args(command_line)
+    module, parser = command_parser(arguments.command)
+    run(module, parser.parse_args(arguments.arguments))
+    return
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# from pypi
+import numpy
+
+# this folder
+from sweep_arrays import AMPLITUDE_TYPE, frequency_steps
+
+class SweepRing(object):
+    """A fixed-size, array-backed store of the most recent sweeps
+
+    Args:
+     capacity (int): the most sweeps to keep
+     steps (int|None): steps in each sweep (None means get it from the first sweep)
+    """
+    def __init__(self, capacity=1000, steps=None):
+        self.capacity = capacity
+        self.steps = None
+        self.amplitudes = None
+        self.capture_times = None
+        self.start_frequency = None
+        self.step_frequency = None
+        self.count = 0
+        self.position = 0
+        if steps is not None:
+            self.allocate(steps)
+        return
+
+    def allocate(self, steps):
+        """Creates empty arrays for sweeps with the given number of steps
+    
+        Args:
+         steps (int): the number of steps in each sweep
+        """
+        self.steps = steps
+        self.amplitudes = numpy.zeros((2 * self.capacity, steps),
+                                      dtype=AMPLITUDE_TYPE)
+        self.capture_times = numpy.zeros(2 * self.capacity,
+                                         dtype="datetime64[us]")
+        self.count = 0
+        self.position = 0
+        return
+
+    def __len__(self):
+        """The number of sweeps in the ring
+    
+        Returns:
+         int: the number of sweeps available
+        """
+        return min(self.count, self.capacity)
+
+    def is_same_configuration(self, sweep):
+        """Checks if the sweep has the same frequencies as the ones in the ring
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to check
+    
+        Returns:
+         bool: True if the sweep can be added to the ones in the ring
+        """
+        return (sweep.TotalSteps == self.steps
+                and abs(sweep.StartFrequencyMHZ - self.start_frequency) < 0.001
+                and abs(sweep.StepFrequencyMHZ - self.step_frequency) < 0.001)
+
+    def append(self, sweep):
+        """Adds the sweep, overwriting the oldest one if the ring is full
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to add
+        """
+        if self.steps is None or self.start_frequency is None:
+            if self.steps != sweep.TotalSteps:
+                self.allocate(sweep.TotalSteps)
+        elif not self.is_same_configuration(sweep):
+            if self.steps == sweep.TotalSteps:
+                self.count = self.position = 0
+            else:
+                self.allocate(sweep.TotalSteps)
+        self.start_frequency = sweep.StartFrequencyMHZ
+        self.step_frequency = sweep.StepFrequencyMHZ
+        amplitudes = sweep.m_arrAmplitude[:self.steps]
+        capture_time = numpy.datetime64(sweep.CaptureTime, "us")
+        for row in (self.position, self.position + self.capacity):
+            self.amplitudes[row] = amplitudes
+            self.capture_times[row] = capture_time
+        self.position = (self.position + 1) % self.capacity
+        self.count += 1
+        return
+
+    def extend(self, sweeps):
+        """Adds the sweeps in order
+    
+        Args:
+         sweeps (iterable): the :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to add
+        """
+        for sweep in sweeps:
+            self.append(sweep)
+        return
+
+    def fill(self, acquisition, timeout=None):
+        """Adds the sweeps the RFECommunicator received since the last fill
+    
+        Args:
+         acquisition (:py:class:`acquisition.Acquisition`): waiter for the RFECommunicator
+         timeout (float|None): seconds to wait for a sweep (None means wait forever)
+    
+        Returns:
+         int: the number of sweeps added
+        """
+        sweeps = acquisition.new_sweeps(timeout)
+        self.extend(sweeps)
+        return len(sweeps)
+
+    def window(self, n=None):
+        """The rows of the doubled arrays holding the last n sweeps
+    
+        Args:
+         n (int|None): the number of sweeps (None means all of them)
+    
+        Returns:
+         slice: the rows (oldest first)
+        """
+        available = len(self)
+        n = available if n is None else min(n, available)
+        stop = self.position + self.capacity
+        return slice(stop - n, stop)
+
+    def last(self, n=None):
+        """Gets the amplitudes for the most recent sweeps
+    
+        Args:
+         n (int|None): the number of sweeps (None means all of them)
+    
+        Returns:
+         numpy.ndarray: read-only (sweeps x steps) view, oldest sweep first
+        """
+        if self.amplitudes is None:
+            return numpy.empty((0, 0), dtype=AMPLITUDE_TYPE)
+        view = self.amplitudes[self.window(n)]
+        view.flags.writeable = False
+        return view
+
+    def last_times(self, n=None):
+        """Gets the capture times for the most recent sweeps
+    
+        Args:
+         n (int|None): the number of sweeps (None means all of them)
+    
+        Returns:
+         numpy.ndarray: read-only view of datetime64 capture times, oldest first
+        """
+        if self.capture_times is None:
+            return numpy.empty(0, dtype="datetime64[us]")
+        view = self.capture_times[self.window(n)]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def frequencies(self):
+        """The frequency for each step in the sweeps
+    
+        Returns:
+         numpy.ndarray: read-only array of frequencies (MHz)
+        """
+        if self.start_frequency is None:
+            return numpy.empty(0, dtype=numpy.float32)
+        return frequency_steps(self.start_frequency, self.step_frequency,
+                               self.steps)
@@ -0,0 +1,153 @@
+# python standard library
+from datetime import datetime, timedelta
+import json
+import os
+import tempfile
+import threading
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "rf_explorer",
+                          "sessions.json")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+TOLERANCE = 0.001
+LOCK = threading.Lock()
+
+def snapshot(rf_explorer):
+    """Gets the device's models, firmware, limits and configuration
+
+    Args:
+     rf_explorer (:py:class:`RFExplorer.RFECommunicator`): set-up communicator
+
+    Returns:
+     dict: the values to save (all JSON types)
+    """
+    return dict(
+        main_board=rf_explorer.MainBoardModel.name,
+        expansion_board=rf_explorer.ExpansionBoardModel.name,
+        active_model=rf_explorer.ActiveModel.name,
+        firmware=rf_explorer.RFExplorerFirmwareDetected,
+        minimum_frequency=rf_explorer.MinFreqMHZ,
+        maximum_frequency=rf_explorer.MaxFreqMHZ,
+        maximum_span=rf_explorer.MaxSpanMHZ,
+        start_frequency=rf_explorer.StartFrequencyMHZ,
+        stop_frequency=rf_explorer.StopFrequencyMHZ,
+        steps=rf_explorer.FreqSpectrumSteps,
+    )
+
+class SessionCache(object):
+    """Remembers how the RF Explorer on each port was set up
+
+    Args:
+     path (str): the JSON file to keep the cache in
+     max_age (float|None): seconds before an entry is too old to use (None means never)
+    """
+    def __init__(self, path=CACHE_PATH, max_age=None):
+        self.path = path
+        self.max_age = max_age
+        return
+
+    def load(self):
+        """Reads the cache file
+    
+        Returns:
+         dict: the entries keyed by serial port
+        """
+        try:
+            with open(self.path) as reader:
+                entries = json.load(reader)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def get(self, port):
+        """Gets the saved snapshot for a port
+    
+        Args:
+         port (str): the serial port the RF Explorer is on
+    
+        Returns:
+         dict|None: the snapshot (None if there isn't one or it's too old)
+        """
+        entry = self.load().get(port)
+        if not isinstance(entry, dict) or "device" not in entry:
+            return None
+        if self.max_age is not None:
+            try:
+                saved = datetime.strptime(entry["saved"], TIME_FORMAT)
+            except (KeyError, ValueError):
+                return None
+            if datetime.now() - saved > timedelta(seconds=self.max_age):
+                return None
+        return entry["device"]
+
+    def matches(self, port, rf_explorer):
+        """Checks if the device on the port is set up the way it was last time
+    
+        Args:
+         port (str): the serial port the RF Explorer is on
+         rf_explorer (:py:class:`RFExplorer.RFECommunicator`): communicator that has the configuration
+    
+        Returns:
+         bool: True if there's an entry for the port and the device matches it
+        """
+        saved = self.get(port)
+        if saved is None:
+            return False
+        current = snapshot(rf_explorer)
+        if set(saved) != set(current):
+            return False
+        for name, value in current.items():
+            if isinstance(value, float):
+                if not isinstance(saved[name], (int, float)):
+                    return False
+                if abs(saved[name] - value) > TOLERANCE:
+                    return False
+            elif saved[name] != value:
+                return False
+        return True
+
+    def save(self, port, rf_explorer):
+        """Saves the device's set-up for the port
+    
+        Args:
+         port (str): the serial port the RF Explorer is on
+         rf_explorer (:py:class:`RFExplorer.RFECommunicator`): set-up communicator
+        """
+        with LOCK:
+            entries = self.load()
+            entries[port] = dict(saved=datetime.now().strftime(TIME_FORMAT),
+                                 device=snapshot(rf_explorer))
+            self.write(entries)
+        return
+    
+    def write(self, entries):
+        """Replaces the cache file
+    
+        Args:
+         entries (dict): the entries keyed by serial port
+        """
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(
+            dir=folder or None, prefix=os.path.basename(self.path) + ".",
+            suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w") as writer:
+                json.dump(entries, writer, indent=2, sort_keys=True)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        return
+
+    def forget(self, port):
+        """Removes the entry for a port
+    
+        Args:
+         port (str): the serial port to forget
+        """
+        with LOCK:
+            entries = self.load()
+            if entries.pop(port, None) is not None:
+                self.write(entries)
+        return
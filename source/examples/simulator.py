@@ -0,0 +1,278 @@
+# python standard library
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+# from pypi
+import numpy
+from serial.tools.list_ports_common import ListPortInfo
+
+RESET_BANNER = b"(C) Ariel Rocholl 2017\r\n"
+MAXIMUM_STEPS = 255
+NOISE_FLOOR = -100
+
+def to_bytes(amplitudes):
+    """Converts amplitudes to the bytes the RF Explorer sends
+
+    Args:
+     amplitudes (numpy.ndarray): amplitudes (dBm)
+
+    Returns:
+     numpy.ndarray: the amplitudes as uint8 (negative half-dBm)
+    """
+    encoded = numpy.round(-2 * numpy.asarray(amplitudes, dtype=numpy.float64))
+    return numpy.clip(encoded, 0, 255).astype(numpy.uint8)
+
+class SimulatedRFExplorer(object):
+    """A pretend RF Explorer on a pseudo-terminal
+
+    Args:
+     start (float): the first frequency (MHz) to sweep
+     stop (float): the last frequency (MHz) to sweep
+     steps (int): the number of steps in a sweep
+     sweep_rate (float|None): sweeps per second (None means as fast as it can)
+     baud_rate (int|None): limit on how fast to send bytes (None means no limit)
+     recorded (numpy.ndarray|None): sweeps x steps amplitudes to replay (dBm)
+     signal (float): frequency (MHz) of the made-up signal
+     reset_time (float): seconds it takes to reset
+     minimum (float): lowest frequency (MHz) the device can sweep
+     maximum (float): highest frequency (MHz) the device can sweep
+     maximum_span (float): widest span (MHz) the device can sweep
+     model (int): the main-board model code
+     seed (int|None): seed for the noise
+     poll_interval (float): seconds to wait for commands before checking if it should stop
+
+    Raises:
+     ValueError: there are too many steps to send as a $S line
+    """
+    def __init__(self, start=2400, stop=2500, steps=112, sweep_rate=10,
+                 baud_rate=None, recorded=None, signal=2450, reset_time=0.1,
+                 minimum=15, maximum=2700, maximum_span=600, model=5, seed=None,
+                 poll_interval=0.1):
+        if recorded is not None:
+            recorded = to_bytes(numpy.atleast_2d(recorded))
+            steps = recorded.shape[1]
+        if not 5 < steps <= MAXIMUM_STEPS:
+            raise ValueError("Steps must be from 6 to {}, not {}".format(
+                MAXIMUM_STEPS, steps))
+        self.start_frequency = start
+        self.stop_frequency = stop
+        self.steps = steps
+        self.sweep_rate = sweep_rate
+        self.baud_rate = baud_rate
+        self.recorded = recorded
+        self.signal = signal
+        self.reset_time = reset_time
+        self.minimum = minimum
+        self.maximum = maximum
+        self.maximum_span = maximum_span
+        self.model = model
+        self.poll_interval = poll_interval
+        self.random = numpy.random.default_rng(seed)
+        self.calculator = 0
+        self.sweeping = False
+        self.sweeps_sent = 0
+        self.bytes_sent = 0
+        self.commands = []
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._reset_at = None
+        self._buffer = b""
+        self._thread = None
+        self._stop = threading.Event()
+        return
+
+    def __enter__(self):
+        """starts the simulator and returns it"""
+        self.start()
+        return self
+    
+    def __exit__(self, type, value, traceback):
+        """closes the simulator"""
+        self.close()
+        return
+
+    @property
+    def port_info(self):
+        """The port-info object for the pseudo-terminal
+    
+        Returns:
+         :py:class:`serial.tools.list_ports_common.ListPortInfo`: info for the port
+        """
+        return ListPortInfo(self.port)
+
+    def start(self):
+        """Creates the pseudo-terminal and starts the simulator's thread"""
+        if self._thread is not None:
+            return
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.port = os.ttyname(self._slave)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="simulator",
+                                        daemon=True)
+        self._thread.start()
+        return
+
+    def close(self):
+        """Stops the thread and closes the pseudo-terminal"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        for descriptor in (self._master, self._slave):
+            os.close(descriptor)
+        self._master = self._slave = None
+        return
+
+    def configuration_line(self):
+        """Builds the line with the current configuration
+    
+        Returns:
+         bytes: the #C2-F line
+        """
+        step = (self.stop_frequency - self.start_frequency) / (self.steps - 1)
+        line = ("#C2-F:{:07d},{:07d},{:04d},{:04d},{:04d},0,000,{:07d},{:07d},"
+                "{:07d},{:05d},{:04d},{:03d}\r\n").format(
+                    int(round(self.start_frequency * 1000)), int(round(step * 10**6)),
+                    0, -120, self.steps, int(round(self.minimum * 1000)),
+                    int(round(self.maximum * 1000)),
+                    int(round(self.maximum_span * 1000)),
+                    max(1, int(round(step * 1000))), 0, self.calculator)
+        return line.encode("ascii")
+
+    def model_line(self):
+        """Builds the line with the model information
+    
+        Returns:
+         bytes: the #C2-M line
+        """
+        return "#C2-M:{:03d},255,01.12\r\n".format(self.model).encode("ascii")
+
+    def encoded(self, index):
+        """Gets the amplitude bytes for a sweep
+    
+        Args:
+         index (int): the number of the sweep (used to pick the recorded sweep)
+    
+        Returns:
+         numpy.ndarray: uint8 amplitudes (negative half-dBm) for each step
+        """
+        if self.recorded is not None:
+            return self.recorded[index % len(self.recorded)]
+        frequencies = numpy.linspace(self.start_frequency, self.stop_frequency,
+                                     self.steps)
+        step = (self.stop_frequency - self.start_frequency) / (self.steps - 1)
+        dbm = NOISE_FLOOR + self.random.normal(0, 2, self.steps)
+        dbm += 40 * numpy.exp(-((frequencies - self.signal) / step) ** 2)
+        return to_bytes(dbm)
+
+    def sweep_line(self):
+        """Builds the line for the next sweep
+    
+        Returns:
+         bytes: the $S line
+        """
+        amplitudes = self.encoded(self.sweeps_sent)
+        return b"$S" + bytes([self.steps]) + amplitudes.tobytes() + b"\r\n"
+
+    def handle(self, command):
+        """Responds to a command from the RFECommunicator
+    
+        Args:
+         command (str): the command (without the '#' and length)
+        """
+        self.commands.append(command)
+        if command == "r":
+            self.sweeping = False
+            self._reset_at = time.monotonic() + self.reset_time
+        elif command == "C0":
+            self.send(self.model_line() + self.configuration_line())
+            self.sweeping = True
+        elif command.startswith("C2-F:"):
+            self.start_frequency = int(command[5:12]) / 1000
+            self.stop_frequency = int(command[13:20]) / 1000
+            self.send(self.configuration_line())
+            self.sweeping = True
+        elif command == "CH":
+            self.sweeping = False
+        elif command.startswith("C+") and len(command) > 2:
+            self.calculator = ord(command[2])
+        return
+
+    def receive(self, data):
+        """Buffers bytes from the RFECommunicator and handles complete commands
+    
+        Args:
+         data (bytes): what was read from the pseudo-terminal
+        """
+        self._buffer += data
+        while self._buffer:
+            start = self._buffer.find(b"#")
+            if start < 0:
+                self._buffer = b""
+                break
+            self._buffer = self._buffer[start:]
+            if len(self._buffer) < 2 or len(self._buffer) < self._buffer[1]:
+                break
+            length = self._buffer[1]
+            self.handle(self._buffer[2:length].decode("latin_1"))
+            self._buffer = self._buffer[max(length, 2):]
+        return
+
+    def send(self, data):
+        """Sends bytes to the RFECommunicator
+    
+        Args:
+         data (bytes): what to send
+        """
+        remaining = memoryview(data)
+        while remaining and not self._stop.is_set():
+            try:
+                written = os.write(self._master, remaining)
+            except BlockingIOError:
+                select.select([], [self._master], [], self.poll_interval)
+                continue
+            remaining = remaining[written:]
+            self.bytes_sent += written
+        if self.baud_rate:
+            time.sleep(len(data) * 10 / self.baud_rate)
+        return
+
+    def run(self):
+        """Answers commands and sends sweeps until told to stop"""
+        next_sweep = time.monotonic()
+        while not self._stop.is_set():
+            now = time.monotonic()
+            deadlines = [now + self.poll_interval]
+            if self._reset_at is not None:
+                deadlines.append(self._reset_at)
+            if self.sweeping:
+                deadlines.append(next_sweep)
+            readable, _, _ = select.select([self._master], [], [],
+                                           max(0, min(deadlines) - now))
+            if readable:
+                try:
+                    self.receive(os.read(self._master, 1024))
+                except BlockingIOError:
+                    pass
+    
+            now = time.monotonic()
+            if self._reset_at is not None and now >= self._reset_at:
+                self._reset_at = None
+                self.send(RESET_BANNER)
+            if self.sweeping and now >= next_sweep:
+                self.send(self.sweep_line())
+                self.sweeps_sent += 1
+                if self.sweep_rate:
+                    next_sweep += 1 / self.sweep_rate
+                    next_sweep = max(next_sweep, time.monotonic())
+                else:
+                    next_sweep = time.monotonic()
+        return
@@ -0,0 +1,163 @@
+# python standard library
+from collections import namedtuple
+
+# from pypi
+import numpy
+
+# this folder
+from sweep_arrays import amplitudes, frequencies
+
+OPEN = "open"
+CLOSE = "close"
+TOLERANCE = 0.001
+
+Event = namedtuple("Event", ["capture_time", "kind", "start", "stop",
+                             "peak_frequency", "peak_amplitude", "excess"])
+
+def runs(mask):
+    """Finds the runs of True values
+
+    Args:
+     mask (numpy.ndarray): boolean array
+
+    Returns:
+     list: (start, stop) index pairs (stop is one past the end of the run)
+    """
+    edges = numpy.diff(mask.astype(numpy.int8), prepend=0, append=0)
+    return list(zip(numpy.flatnonzero(edges == 1).tolist(),
+                    numpy.flatnonzero(edges == -1).tolist()))
+
+class Squelch(object):
+    """Passes on sweeps only when something in the band changes
+
+    Args:
+     threshold (float|None): dB above the baseline for a step to open (None means always open)
+     hysteresis (float): dB below the threshold a step has to drop to close
+     decay (float): weight of each sweep in the baseline
+     warmup (int): number of sweeps to average before anything can open
+    """
+    def __init__(self, threshold=None, hysteresis=3, decay=0.05, warmup=10):
+        self.threshold = threshold
+        self.hysteresis = hysteresis
+        self.decay = decay
+        self.warmup = warmup
+        self.configuration = None
+        self.count = 0
+        self.baseline = None
+        self.open = None
+        self.sweeps_in = 0
+        self.sweeps_out = 0
+        return
+
+    @classmethod
+    def from_arguments(cls, arguments):
+        """Builds the squelch from the command-line arguments
+    
+        Args:
+         arguments (argparse.Namespace): the parsed arguments
+    
+        Returns:
+         Squelch: squelch with the settings from the arguments
+        """
+        return cls(threshold=arguments.squelch, hysteresis=arguments.hysteresis)
+
+    def reset(self, steps):
+        """Throws away the baseline and closes all the steps
+    
+        Args:
+         steps (int): the number of steps in the sweeps
+        """
+        self.count = 0
+        self.baseline = numpy.zeros(steps, dtype=numpy.float64)
+        self.open = numpy.zeros(steps, dtype=bool)
+        return
+
+    def is_same_configuration(self, sweep):
+        """Checks if the sweep has the same frequencies as the baseline
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to check
+    
+        Returns:
+         bool: True if the sweep can be compared to the baseline
+        """
+        if self.configuration is None:
+            return False
+        start, step, steps = self.configuration
+        return (sweep.TotalSteps == steps
+                and abs(sweep.StartFrequencyMHZ - start) < TOLERANCE
+                and abs(sweep.StepFrequencyMHZ - step) < TOLERANCE)
+
+    def update(self, sweep):
+        """Compares the sweep to the baseline
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the new sweep
+    
+        Returns:
+         list: the :py:class:`Event` tuples for the steps that opened or closed
+        """
+        if not self.is_same_configuration(sweep):
+            self.configuration = (sweep.StartFrequencyMHZ, sweep.StepFrequencyMHZ,
+                                  sweep.TotalSteps)
+            self.reset(sweep.TotalSteps)
+        amplitude = amplitudes(sweep).astype(numpy.float64)
+        self.sweeps_in += 1
+        events = []
+        if self.threshold is not None and self.count >= self.warmup:
+            excess = amplitude - self.baseline
+            was_open = self.open
+            self.open = numpy.where(was_open,
+                                    excess >= self.threshold - self.hysteresis,
+                                    excess > self.threshold)
+            frequency = frequencies(sweep)
+            for kind, mask in ((OPEN, self.open & ~was_open),
+                               (CLOSE, was_open & ~self.open)):
+                for start, stop in runs(mask):
+                    peak = start + int(amplitude[start:stop].argmax())
+                    events.append(Event(sweep.CaptureTime, kind,
+                                        float(frequency[start]),
+                                        float(frequency[stop - 1]),
+                                        float(frequency[peak]),
+                                        float(amplitude[peak]),
+                                        float(excess[peak])))
+    
+        weight = max(1 / (self.count + 1), self.decay)
+        closed = ~self.open
+        self.baseline[closed] += weight * (amplitude[closed] - self.baseline[closed])
+        self.count += 1
+        return events
+
+    def filter(self, sweeps):
+        """Gets the sweeps where something changed
+    
+        Args:
+         sweeps (iterable): :py:class:`RFExplorer.RFESweepData.RFESweepData` objects in order
+    
+        Returns:
+         list: the sweeps that had events (all of them if there's no threshold)
+        """
+        if self.threshold is None:
+            passed = list(sweeps)
+            self.sweeps_in += len(passed)
+        else:
+            passed = [sweep for sweep in sweeps if self.update(sweep)]
+        self.sweeps_out += len(passed)
+        return passed
+
+def add_arguments(parser):
+    """adds the squelch arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with the squelch arguments
+    """
+    parser.add_argument(
+        "--squelch", type=float, default=None,
+        help="Only show sweeps where a step goes this many dB above the baseline (default=%(default)s)")
+    parser.add_argument(
+        "--hysteresis", type=float, default=3,
+        help="dB below the squelch a step has to drop to close again (default=%(default)s)")
+    return parser
@@ -0,0 +1,453 @@
+# python standard library
+from base64 import b64encode
+from collections import namedtuple
+from hashlib import sha1
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import struct
+
+# from pypi
+import numpy
+
+# this folder
+from async_communicator import AsyncCommunicator
+from example_1 import argument_parser
+from sweep_arrays import amplitudes
+
+HOST = "127.0.0.1"
+PORT = 8765
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+KEY = 0
+DELTA = 1
+KEY_HEADER = struct.Struct("<BIdddH")
+DELTA_HEADER = struct.Struct("<BIdH")
+
+BINARY = 0x2
+CLOSE = 0x8
+PING = 0x9
+PONG = 0xA
+MAXIMUM_MESSAGE = 2**16
+
+Spectrum = namedtuple("Spectrum", ["sequence", "capture_time", "start_frequency",
+                                   "step_frequency", "amplitude"])
+
+def quantize(sweep, sequence=0):
+    """Converts a sweep to a Spectrum with a byte for each step
+
+    Args:
+     sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep
+     sequence (int): the sweep's number
+
+    Returns:
+     Spectrum: the sweep with its amplitudes in half-dB steps below 0 dBm
+    """
+    amplitude = numpy.clip(numpy.rint(amplitudes(sweep) * -2), 0, 255)
+    return Spectrum(sequence, sweep.CaptureTime.timestamp(),
+                    sweep.StartFrequencyMHZ, sweep.StepFrequencyMHZ,
+                    amplitude.astype(numpy.uint8))
+
+def key_frame(spectrum):
+    """Packs a whole spectrum
+
+    Args:
+     spectrum (Spectrum): the quantized sweep
+
+    Returns:
+     bytes: the key frame
+    """
+    return KEY_HEADER.pack(KEY, spectrum.sequence, spectrum.capture_time,
+                           spectrum.start_frequency, spectrum.step_frequency,
+                           len(spectrum.amplitude)) + spectrum.amplitude.tobytes()
+
+def decode_frame(data, amplitude=None):
+    """Unpacks a frame
+
+    Args:
+     data (bytes): the frame
+     amplitude (numpy.ndarray|None): the client's uint8 amplitudes (needed for delta frames)
+
+    Returns:
+     tuple: the header (dict) and the updated uint8 amplitudes
+
+    Raises:
+     ValueError: the frame is a delta frame and there's no amplitude array for it
+    """
+    if data[0] == KEY:
+        kind, sequence, capture_time, start, step, steps = KEY_HEADER.unpack_from(data)
+        header = dict(kind=kind, sequence=sequence, capture_time=capture_time,
+                      start_frequency=start, step_frequency=step)
+        amplitude = numpy.frombuffer(data, dtype=numpy.uint8, count=steps,
+                                     offset=KEY_HEADER.size).copy()
+        return header, amplitude
+    if amplitude is None:
+        raise ValueError("Got a delta frame before a key frame")
+    kind, sequence, capture_time, count = DELTA_HEADER.unpack_from(data)
+    offset = DELTA_HEADER.size
+    size = (len(amplitude) + 7) // 8
+    changed = numpy.unpackbits(
+        numpy.frombuffer(data, dtype=numpy.uint8, count=size, offset=offset),
+        count=len(amplitude), bitorder="little").astype(bool)
+    amplitude[changed] = numpy.frombuffer(data, dtype=numpy.uint8, count=count,
+                                          offset=offset + size)
+    return dict(kind=kind, sequence=sequence, capture_time=capture_time), amplitude
+
+def accept_key(key):
+    """Makes the Sec-WebSocket-Accept value for a client's key
+
+    Args:
+     key (str): the client's Sec-WebSocket-Key
+
+    Returns:
+     str: the value to send back
+    """
+    return b64encode(sha1((key + GUID).encode("ascii")).digest()).decode("ascii")
+
+def websocket_frame(payload, opcode=BINARY):
+    """Wraps a payload in a (final, unmasked) WebSocket frame
+
+    Args:
+     payload (bytes): what to send
+     opcode (int): the frame type
+
+    Returns:
+     bytes: the frame
+    """
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 2**16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+async def read_frame(reader):
+    """Reads a frame from a client
+
+    Args:
+     reader (:py:class:`asyncio.StreamReader`): the client's stream
+
+    Returns:
+     tuple: the opcode and the unmasked payload
+
+    Raises:
+     asyncio.IncompleteReadError: the client went away
+     ValueError: the frame is too big
+    """
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAXIMUM_MESSAGE:
+        raise ValueError("Client frame too big ({} bytes)".format(length))
+    mask = await reader.readexactly(4) if second & 0x80 else bytes(4)
+    payload = bytearray(await reader.readexactly(length))
+    for index in range(length):
+        payload[index] ^= mask[index % 4]
+    return first & 0x0F, bytes(payload)
+
+class StreamClient(object):
+    """What one client was sent
+
+    Args:
+     rate (float): most frames per second to send
+     threshold (int): smallest change (half-dB) that gets sent
+     key_interval (int): frames between key frames
+    """
+    def __init__(self, rate, threshold=2, key_interval=100):
+        self.rate = rate
+        self.threshold = max(threshold, 1)
+        self.key_interval = key_interval
+        self.sent = None
+        self.configuration = None
+        self.since_key = 0
+        self.frames = 0
+        self.bytes = 0
+        self.sequence = None
+        self.closed = asyncio.Event()
+        return
+
+    def frame(self, spectrum):
+        """Makes the next frame for the client
+    
+        Args:
+         spectrum (Spectrum): the newest quantized sweep
+    
+        Returns:
+         bytes: a key or delta frame
+        """
+        configuration = (spectrum.start_frequency, spectrum.step_frequency,
+                         len(spectrum.amplitude))
+        data = None
+        if (self.sent is not None and configuration == self.configuration
+                and self.since_key < self.key_interval):
+            changed = (numpy.abs(spectrum.amplitude.astype(numpy.int16) - self.sent)
+                       >= self.threshold)
+            data = b"".join((
+                DELTA_HEADER.pack(DELTA, spectrum.sequence, spectrum.capture_time,
+                                  int(changed.sum())),
+                numpy.packbits(changed, bitorder="little").tobytes(),
+                spectrum.amplitude[changed].tobytes()))
+            if len(data) < KEY_HEADER.size + len(spectrum.amplitude):
+                self.sent[changed] = spectrum.amplitude[changed]
+                self.since_key += 1
+            else:
+                data = None
+        if data is None:
+            data = key_frame(spectrum)
+            self.sent = spectrum.amplitude.astype(numpy.int16)
+            self.configuration = configuration
+            self.since_key = 0
+        self.sequence = spectrum.sequence
+        self.frames += 1
+        self.bytes += len(data)
+        return data
+
+class StreamServer(object):
+    """Sends the sweeps from one AsyncCommunicator to WebSocket clients
+
+    Args:
+     communicator (:py:class:`async_communicator.AsyncCommunicator`): set-up communicator
+     host (str): address to listen on
+     port (int): port to listen on
+     rate (float): most frames per second to send each client
+     threshold (float): smallest change (dB) that gets sent
+     key_interval (int): frames between key frames
+    """
+    def __init__(self, communicator, host=HOST, port=PORT, rate=10,
+                 threshold=1, key_interval=100):
+        self.communicator = communicator
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.threshold = int(round(threshold * 2))
+        self.key_interval = key_interval
+        self.clients = set()
+        self.spectrum = None
+        self.sequence = 0
+        self.stopped = False
+        self.updated = asyncio.Condition()
+        self.server = None
+        self._feeder = None
+        self._handlers = set()
+        return
+
+    async def __aenter__(self):
+        """starts the server"""
+        await self.start()
+        return self
+    
+    async def __aexit__(self, type, value, traceback):
+        """stops the server"""
+        await self.close()
+        return
+
+    async def start(self):
+        """Starts feeding the sweeps and listening for clients"""
+        self._feeder = asyncio.ensure_future(self.feed())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        return
+
+    async def feed(self):
+        """Quantizes the sweeps and wakes up the clients"""
+        async for sweep in self.communicator.sweeps(maxsize=1):
+            self.sequence += 1
+            spectrum = quantize(sweep, self.sequence)
+            async with self.updated:
+                self.spectrum = spectrum
+                self.updated.notify_all()
+        await self.stop()
+        return
+    
+    async def stop(self):
+        """Tells the clients that there won't be any more sweeps"""
+        async with self.updated:
+            self.stopped = True
+            self.updated.notify_all()
+        return
+
+    async def handshake(self, reader, writer):
+        """Upgrades the client's connection to a WebSocket
+    
+        Args:
+         reader (:py:class:`asyncio.StreamReader`): the client's stream
+         writer (:py:class:`asyncio.StreamWriter`): the stream to the client
+    
+        Returns:
+         StreamClient|None: the client (None if the request wasn't a WebSocket upgrade)
+        """
+        request = (await reader.readuntil(b"\r\n\r\n")).decode("latin_1")
+        lines = request.split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        parts = lines[0].split()
+        key = headers.get("sec-websocket-key")
+        if (key is None or not parts or parts[0] != "GET"
+                or headers.get("upgrade", "").lower() != "websocket"):
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return None
+        query = parse_qs(urlsplit(parts[1] if len(parts) > 1 else "/").query)
+        rate = self.rate
+        try:
+            rate = min(rate, float(query["rate"][0]))
+        except (KeyError, ValueError):
+            pass
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      "Sec-WebSocket-Accept: {}\r\n\r\n").format(accept_key(key))
+                     .encode("ascii"))
+        await writer.drain()
+        return StreamClient(rate, self.threshold, self.key_interval)
+
+    async def handle(self, reader, writer):
+        """Sends frames to a client until it (or the server) closes
+    
+        Args:
+         reader (:py:class:`asyncio.StreamReader`): the client's stream
+         writer (:py:class:`asyncio.StreamWriter`): the stream to the client
+        """
+        client = listener = None
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            client = await self.handshake(reader, writer)
+            if client is None:
+                return
+            self.clients.add(client)
+            listener = asyncio.ensure_future(self.listen(reader, writer, client))
+            loop = asyncio.get_running_loop()
+            interval = 1 / client.rate if client.rate > 0 else 0
+            while True:
+                async with self.updated:
+                    await self.updated.wait_for(
+                        lambda: (self.stopped or client.closed.is_set()
+                                 or (self.spectrum is not None
+                                     and self.spectrum.sequence != client.sequence)))
+                    spectrum = self.spectrum
+                if self.stopped or client.closed.is_set():
+                    break
+                sent = loop.time()
+                writer.write(websocket_frame(client.frame(spectrum)))
+                await writer.drain()
+                try:
+                    await asyncio.wait_for(client.closed.wait(),
+                                           max(0, interval - (loop.time() - sent)))
+                except asyncio.TimeoutError:
+                    pass
+            if not client.closed.is_set():
+                writer.write(websocket_frame(b"", CLOSE))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if listener is not None:
+                listener.cancel()
+            self.clients.discard(client)
+            self._handlers.discard(handler)
+            writer.close()
+        return
+
+    async def listen(self, reader, writer, client):
+        """Answers a client's pings until it closes
+    
+        Args:
+         reader (:py:class:`asyncio.StreamReader`): the client's stream
+         writer (:py:class:`asyncio.StreamWriter`): the stream to the client
+         client (StreamClient): the client to mark closed when it goes away
+        """
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == CLOSE:
+                    writer.write(websocket_frame(payload[:2], CLOSE))
+                    break
+                if opcode == PING:
+                    writer.write(websocket_frame(payload, PONG))
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            client.closed.set()
+            async with self.updated:
+                self.updated.notify_all()
+        return
+
+    async def close(self):
+        """Stops feeding, closes the clients and stops listening"""
+        if self._feeder is not None:
+            self._feeder.cancel()
+            try:
+                await self._feeder
+            except asyncio.CancelledError:
+                pass
+            self._feeder = None
+        await self.stop()
+        if self._handlers:
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        return
+
+def add_arguments(parser):
+    """adds the stream server arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with the stream server arguments
+    """
+    parser.add_argument(
+        "--host", default=HOST,
+        help="Address to listen on (default=%(default)s)")
+    parser.add_argument(
+        "--port", type=int, default=PORT,
+        help="Port to listen on (default=%(default)s)")
+    parser.add_argument(
+        "--rate", type=float, default=10,
+        help="Most frames per second for each client (default=%(default)s)")
+    parser.add_argument(
+        "--threshold", type=float, default=1,
+        help="Smallest change (dB) in a step that gets sent (default=%(default)s)")
+    parser.add_argument(
+        "--serve-time", type=float, default=0,
+        help="Seconds to serve for (0 means until interrupted, default=%(default)s)")
+    return parser
+
+async def main(arguments):
+    """Runs the stream server
+
+    Args:
+     arguments (argparse.Namespace): object with the settings
+    """
+    async with AsyncCommunicator(arguments.serialport, arguments.baud_rate,
+                                 timeout=arguments.timeout,
+                                 adaptive_settle=arguments.adaptive_settle,
+                                 warm_start=arguments.warm_start,
+                                 fast_parser=arguments.fast_parser) as communicator:
+        await communicator.set_up()
+        async with StreamServer(communicator, arguments.host, arguments.port,
+                                rate=arguments.rate,
+                                threshold=arguments.threshold) as server:
+            print("Streaming on ws://{}:{}/".format(arguments.host, arguments.port))
+            if arguments.serve_time:
+                await asyncio.sleep(arguments.serve_time)
+            else:
+                await asyncio.Event().wait()
+    return
+
+if __name__ == "__main__":
+    parser = add_arguments(argument_parser())
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(main(arguments))
+    except KeyboardInterrupt:
+        print("Stopped.")
@@ -0,0 +1,145 @@
+# python standard library
+from functools import lru_cache
+
+# from pypi
+import numpy
+
+AMPLITUDE_TYPE = numpy.float32
+FREQUENCY_TYPE = numpy.float32
+
+def amplitudes(sweep):
+    """Gets the amplitudes for every step in the sweep
+
+    Args:
+     sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep
+
+    Returns:
+     numpy.ndarray: the amplitudes (dBm) for each step
+    """
+    return numpy.array(sweep.m_arrAmplitude[:sweep.TotalSteps],
+                       dtype=AMPLITUDE_TYPE)
+
+@lru_cache(maxsize=32)
+def frequency_steps(start, step, steps):
+    """Builds the frequencies for a sweep configuration
+
+    Args:
+     start (float): the frequency (MHz) of the first step
+     step (float): the MHz between steps
+     steps (int): the number of steps in the sweep
+
+    Returns:
+     numpy.ndarray: read-only array of frequencies (MHz)
+    """
+    frequency = (start + step * numpy.arange(steps)).astype(FREQUENCY_TYPE)
+    frequency.flags.writeable = False
+    return frequency
+
+def frequencies(sweep):
+    """Gets the frequency for every step in the sweep
+
+    Args:
+     sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep
+
+    Returns:
+     numpy.ndarray: read-only array of frequencies (MHz) for each step
+    """
+    return frequency_steps(sweep.StartFrequencyMHZ, sweep.StepFrequencyMHZ,
+                           sweep.TotalSteps)
+
+def stack(collection, start=0, stop=None):
+    """Puts the amplitudes for a run of sweeps into one array
+
+    Args:
+     collection (:py:class:`RFExplorer.RFESweepDataCollection.RFESweepDataCollection`): sweeps
+     start (int): index of the first sweep to use
+     stop (int|None): index after the last sweep to use (default is Count)
+
+    Returns:
+     numpy.ndarray: (sweeps x steps) array of amplitudes
+
+    Raises:
+     ValueError: the sweeps don't all have the same number of steps
+    """
+    stop = collection.Count if stop is None else min(stop, collection.Count)
+    if stop <= start:
+        return numpy.empty((0, 0), dtype=AMPLITUDE_TYPE)
+    steps = collection.GetData(start).TotalSteps
+    stacked = numpy.empty((stop - start, steps), dtype=AMPLITUDE_TYPE)
+    for row, index in enumerate(range(start, stop)):
+        sweep = collection.GetData(index)
+        if sweep.TotalSteps != steps:
+            raise ValueError("Sweep {} has {} steps, expected {}".format(
+                index, sweep.TotalSteps, steps))
+        stacked[row] = sweep.m_arrAmplitude[:steps]
+    return stacked
+
+def capture_times(collection, start=0, stop=None):
+    """Gets the capture times for a run of sweeps
+
+    Args:
+     collection (:py:class:`RFExplorer.RFESweepDataCollection.RFESweepDataCollection`): sweeps
+     start (int): index of the first sweep to use
+     stop (int|None): index after the last sweep to use (default is Count)
+
+    Returns:
+     numpy.ndarray: datetime64 array with the CaptureTime for each sweep
+    """
+    stop = collection.Count if stop is None else min(stop, collection.Count)
+    return numpy.array([collection.GetData(index).CaptureTime
+                        for index in range(start, stop)],
+                       dtype="datetime64[us]")
+
+class SweepArray(object):
+    """Array version of one sweep
+
+    Args:
+     sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to convert
+    """
+    def __init__(self, sweep):
+        self.capture_time = sweep.CaptureTime
+        self.amplitude = amplitudes(sweep)
+        self.frequency = frequencies(sweep)
+        return
+
+    @classmethod
+    def from_collection(cls, collection, index=None):
+        """Builds the SweepArray for a sweep in the collection
+    
+        Args:
+         collection (:py:class:`RFExplorer.RFESweepDataCollection.RFESweepDataCollection`): sweeps
+         index (int|None): index of the sweep (default is the latest)
+    
+        Returns:
+         SweepArray: the converted sweep
+        """
+        if index is None:
+            index = collection.Count - 1
+        return cls(collection.GetData(index))
+
+    @property
+    def peak_step(self):
+        """The index of the step with the largest amplitude
+    
+        Returns:
+         int: the step with the peak amplitude
+        """
+        return int(self.amplitude.argmax())
+
+    @property
+    def peak_amplitude(self):
+        """The largest amplitude in the sweep
+    
+        Returns:
+         float: the peak amplitude (dBm)
+        """
+        return float(self.amplitude[self.peak_step])
+
+    @property
+    def peak_frequency(self):
+        """The frequency of the step with the largest amplitude
+    
+        Returns:
+         float: the frequency (MHz) at the peak
+        """
+        return float(self.frequency[self.peak_step])
@@ -0,0 +1,259 @@
+# python standard library
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import sys
+import threading
+import time
+
+# from pypi
+from RFExplorer.RFEConfiguration import RFEConfiguration
+from RFExplorer.RFESweepData import RFESweepData
+
+COUNTERS = ("bytes", "messages", "sweeps_received", "sweeps_processed",
+            "sweeps_dropped", "sweeps_delivered", "parse_errors", "buffer_full")
+GAUGES = ("queue_depth", "lag")
+RATES = ("bytes", "sweeps_received", "sweeps_processed", "sweeps_delivered")
+PREFIX = "rf_explorer_"
+HOST = "127.0.0.1"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+def message_size(item):
+    """Works out how many bytes the serial port read for a queued item
+
+    Args:
+     item: something the ReceiveSerialThread put on the queue
+
+    Returns:
+     int: the number of bytes it came from
+    """
+    if isinstance(item, RFESweepData):
+        return item.TotalSteps + 5
+    if isinstance(item, RFEConfiguration):
+        return len(item.LineString) + 2
+    if isinstance(item, str):
+        return len(item) + 2
+    return 0
+
+class Telemetry(object):
+    """Counters and gauges for how the acquisition is keeping up"""
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.gauges = {}
+        for name in GAUGES:
+            self.gauges[name] = 0
+            self.gauges[name + "_max"] = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        return
+
+    def count(self, name, amount=1):
+        """Adds to a counter
+    
+        Args:
+         name (str): the counter
+         amount (int): how much to add
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+        return
+
+    def gauge(self, name, value):
+        """Sets a gauge (and its maximum)
+    
+        Args:
+         name (str): the gauge
+         value (float): its current value
+        """
+        maximum = name + "_max"
+        with self._lock:
+            self.gauges[name] = value
+            self.gauges[maximum] = max(value, self.gauges.get(maximum, value))
+        return
+
+    def snapshot(self):
+        """Copies the current values
+    
+        Returns:
+         dict: the counters, the gauges and the seconds since this was created
+        """
+        with self._lock:
+            values = dict(self.counters)
+            values.update(self.gauges)
+        values["uptime"] = time.monotonic() - self.started
+        return values
+
+def rates(before, after):
+    """Works out the per-second rates between two snapshots
+
+    Args:
+     before (dict): the earlier snapshot
+     after (dict): the later snapshot
+
+    Returns:
+     dict: '<counter>_per_second' values for the RATES counters
+    """
+    elapsed = after["uptime"] - before["uptime"]
+    if elapsed <= 0:
+        return {}
+    return {name + "_per_second": (after[name] - before[name]) / elapsed
+            for name in RATES}
+
+def prometheus(snapshot):
+    """Formats a snapshot for Prometheus
+
+    Args:
+     snapshot (dict): values from :py:meth:`Telemetry.snapshot`
+
+    Returns:
+     str: the metrics in the Prometheus text format
+    """
+    lines = []
+    for name in sorted(snapshot):
+        kind = "counter" if name in COUNTERS else "gauge"
+        metric = PREFIX + name + ("_total" if kind == "counter" else "")
+        lines.append("# TYPE {} {}".format(metric, kind))
+        lines.append("{} {}".format(metric, snapshot[name]))
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the telemetry over HTTP"""
+    def do_GET(self):
+        """Sends the metrics"""
+        snapshot = self.server.telemetry.snapshot()
+        if self.path == "/metrics":
+            body = prometheus(snapshot)
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body = json.dumps(snapshot)
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        return
+
+    def log_message(self, format, *arguments):
+        """Doesn't log the requests"""
+        return
+
+class TelemetryReporter(object):
+    """Logs and serves the telemetry
+
+    Args:
+     telemetry (Telemetry): the values to report
+     interval (float|None): seconds between log lines (None means don't log)
+     port (int|None): port to serve the metrics on (None means don't serve)
+     host (str): address to serve the metrics on
+     stream (file|None): where to write the log lines (None means stderr)
+    """
+    def __init__(self, telemetry, interval=None, port=None, host=HOST,
+                 stream=None):
+        self.telemetry = telemetry
+        self.interval = interval
+        self.port = port
+        self.host = host
+        self.stream = stream
+        self.server = None
+        self._previous = None
+        self._stop = threading.Event()
+        self._threads = []
+        return
+
+    @classmethod
+    def from_arguments(cls, arguments, telemetry):
+        """Builds the reporter from the command-line arguments
+    
+        Args:
+         arguments (argparse.Namespace): the parsed arguments
+         telemetry (Telemetry): the values to report
+    
+        Returns:
+         TelemetryReporter: reporter with the settings from the arguments
+        """
+        return cls(telemetry, interval=arguments.telemetry_interval,
+                   port=arguments.metrics_port)
+
+    def __enter__(self):
+        """starts reporting"""
+        return self.start()
+    
+    def __exit__(self, type, value, traceback):
+        """stops reporting"""
+        self.stop()
+        return
+
+    def log_line(self):
+        """Makes the log line for the current values
+    
+        Returns:
+         str: JSON with the time, the snapshot and the rates since the last line
+        """
+        snapshot = self.telemetry.snapshot()
+        line = dict(time=datetime.now().strftime(TIME_FORMAT))
+        line.update(snapshot)
+        line.update(rates(self._previous or dict.fromkeys(snapshot, 0), snapshot))
+        self._previous = snapshot
+        return json.dumps(line)
+
+    def log(self):
+        """Prints a log line every interval until stopped"""
+        while not self._stop.wait(self.interval):
+            print(self.log_line(), file=self.stream or sys.stderr, flush=True)
+        return
+
+    def start(self):
+        """Starts the logging and serving threads
+    
+        Returns:
+         TelemetryReporter: this object
+        """
+        self._stop.clear()
+        if self.interval:
+            self._threads.append(threading.Thread(target=self.log, daemon=True,
+                                                  name="telemetry-log"))
+        if self.port is not None:
+            self.server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+            self.server.daemon_threads = True
+            self.server.telemetry = self.telemetry
+            self._threads.append(threading.Thread(target=self.server.serve_forever,
+                                                  daemon=True, name="telemetry-http"))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stops the threads"""
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join()
+        if self.interval and self._threads:
+            print(self.log_line(), file=self.stream or sys.stderr, flush=True)
+        self._threads = []
+        return
+
+def add_arguments(parser):
+    """adds the telemetry arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with the telemetry arguments
+    """
+    parser.add_argument(
+        "--telemetry-interval", type=float, default=None,
+        help="Seconds between telemetry log lines on stderr (default=%(default)s)")
+    parser.add_argument(
+        "--metrics-port", type=int, default=None,
+        help="Serve the telemetry at http://{}:<port>/metrics (default=%(default)s)".format(HOST))
+    return parser
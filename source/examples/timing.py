@@ -0,0 +1,138 @@
+# python standard library
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+
+BUCKET_EDGES = tuple(10 ** (exponent / 10) for exponent in range(-40, 21))
+
+class Histogram(object):
+    """Counts of how long something took, in logarithmic buckets"""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self._lock = threading.Lock()
+        return
+
+    def record(self, seconds):
+        """Adds a measurement
+    
+        Args:
+         seconds (float): how long the thing took
+        """
+        with self._lock:
+            self.counts[bisect_left(BUCKET_EDGES, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if self.minimum is None or seconds < self.minimum:
+                self.minimum = seconds
+            if self.maximum is None or seconds > self.maximum:
+                self.maximum = seconds
+        return
+
+    @property
+    def mean(self):
+        """The average of the measurements
+    
+        Returns:
+         float|None: the mean (None if nothing was recorded)
+        """
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def percentile(self, percent):
+        """Estimates a percentile of the measurements
+    
+        Args:
+         percent (float): the percentile to get (e.g. 50 for the median)
+    
+        Returns:
+         float|None: the estimated percentile (None if nothing was recorded)
+        """
+        if not self.count:
+            return None
+        target = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                break
+        if index == len(BUCKET_EDGES):
+            return self.maximum
+        return min(BUCKET_EDGES[index], self.maximum)
+
+    def summary(self):
+        """The statistics for the measurements
+    
+        Returns:
+         dict: count, mean, minimum, 50th, 90th and 99th percentiles, and maximum
+        """
+        return dict(count=self.count, mean=self.mean, minimum=self.minimum,
+                    p50=self.percentile(50), p90=self.percentile(90),
+                    p99=self.percentile(99), maximum=self.maximum)
+
+class Timings(object):
+    """Histograms of how long things took, by name"""
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+        return
+
+    def histogram(self, name):
+        """Gets the histogram for the name (creating it if needed)
+    
+        Args:
+         name (str): what's being timed
+    
+        Returns:
+         Histogram: the histogram for the name
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def record(self, name, seconds):
+        """Adds a measurement
+    
+        Args:
+         name (str): what was timed
+         seconds (float): how long it took
+        """
+        self.histogram(name).record(seconds)
+        return
+
+    @contextmanager
+    def timer(self, name):
+        """Times the code in a with-statement
+    
+        Args:
+         name (str): what's being timed
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - start)
+
+    def report(self):
+        """Makes a table of the statistics for each histogram
+    
+        Returns:
+         str: one line per histogram (times in seconds)
+        """
+        lines = ["{:<14}{:>7}{:>10}{:>10}{:>10}{:>10}{:>10}".format(
+            "name", "count", "mean", "p50", "p90", "p99", "max")]
+        for name in sorted(self.histograms):
+            summary = self.histograms[name].summary()
+            if not summary["count"]:
+                continue
+            lines.append("{:<14}{:>7}{:>10.4f}{:>10.4f}{:>10.4f}{:>10.4f}{:>10.4f}".format(
+                name, summary["count"], summary["mean"], summary["p50"],
+                summary["p90"], summary["p99"], summary["maximum"]))
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+# python standard library
+from collections import namedtuple
+
+# from pypi
+import numpy
+
+# this folder
+from sweep_arrays import AMPLITUDE_TYPE, FREQUENCY_TYPE, frequency_steps
+
+Peak = namedtuple("Peak", ["frequency", "amplitude", "step"])
+
+class Traces(object):
+    """Max-hold, min-hold and average traces updated one sweep at a time
+
+    Args:
+     decay (float|None): weight of a new sweep in the average (None means a plain mean)
+     window (int|None): number of sweeps in the windowed average (None means none)
+     hold_decay (float): fraction the holds move toward each new sweep
+     peak_count (int): the number of peaks to find for each sweep
+    """
+    def __init__(self, decay=None, window=None, hold_decay=0, peak_count=5):
+        self.decay = decay
+        self.window = window
+        self.hold_decay = hold_decay
+        self.peak_count = peak_count
+        self.steps = None
+        self.start_frequency = None
+        self.step_frequency = None
+        self.count = 0
+        self.latest = None
+        self.maximum = None
+        self.minimum = None
+        self.average = None
+        self._window_sweeps = None
+        self._window_sum = None
+        return
+
+    def reset(self, steps=None):
+        """Empties the traces
+    
+        Args:
+         steps (int|None): the number of steps in the sweeps (None means keep the same)
+        """
+        if steps is not None:
+            self.steps = steps
+        self.count = 0
+        self.latest = None
+        self.maximum = numpy.full(self.steps, -numpy.inf, dtype=AMPLITUDE_TYPE)
+        self.minimum = numpy.full(self.steps, numpy.inf, dtype=AMPLITUDE_TYPE)
+        self.average = numpy.zeros(self.steps, dtype=AMPLITUDE_TYPE)
+        if self.window is not None:
+            self._window_sweeps = numpy.zeros((self.window, self.steps),
+                                              dtype=AMPLITUDE_TYPE)
+            self._window_sum = numpy.zeros(self.steps, dtype=numpy.float64)
+        return
+
+    def is_same_configuration(self, sweep):
+        """Checks if the sweep has the same frequencies as the traces
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to check
+    
+        Returns:
+         bool: True if the sweep can be added to the traces
+        """
+        return (self.start_frequency is not None
+                and sweep.TotalSteps == self.steps
+                and abs(sweep.StartFrequencyMHZ - self.start_frequency) < 0.001
+                and abs(sweep.StepFrequencyMHZ - self.step_frequency) < 0.001)
+
+    def update(self, sweep):
+        """Adds a sweep to the traces
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the new sweep
+    
+        Returns:
+         list: the strongest :py:class:`Peak` tuples in the sweep (largest first)
+        """
+        if not self.is_same_configuration(sweep):
+            self.start_frequency = sweep.StartFrequencyMHZ
+            self.step_frequency = sweep.StepFrequencyMHZ
+            self.reset(sweep.TotalSteps)
+        amplitude = numpy.array(sweep.m_arrAmplitude[:self.steps],
+                                dtype=AMPLITUDE_TYPE)
+        if self.hold_decay and self.count:
+            self.maximum -= self.hold_decay * (self.maximum - amplitude)
+            self.minimum -= self.hold_decay * (self.minimum - amplitude)
+        numpy.maximum(self.maximum, amplitude, out=self.maximum)
+        numpy.minimum(self.minimum, amplitude, out=self.minimum)
+    
+        weight = 1 / (self.count + 1)
+        if self.decay is not None:
+            weight = max(weight, self.decay)
+        self.average += weight * (amplitude - self.average)
+    
+        if self.window is not None:
+            row = self.count % self.window
+            if self.count >= self.window:
+                self._window_sum -= self._window_sweeps[row]
+            self._window_sweeps[row] = amplitude
+            self._window_sum += amplitude
+    
+        self.latest = amplitude
+        self.count += 1
+        return self.peaks(self.peak_count)
+
+    def extend(self, sweeps):
+        """Adds the sweeps in order
+    
+        Args:
+         sweeps (iterable): the :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to add
+        """
+        for sweep in sweeps:
+            self.update(sweep)
+        return
+
+    @property
+    def windowed_average(self):
+        """The mean of the sweeps in the window
+    
+        Returns:
+         numpy.ndarray|None: the average (None if there's no window or no sweeps)
+        """
+        if self.window is None or not self.count:
+            return None
+        return (self._window_sum / min(self.count, self.window)).astype(AMPLITUDE_TYPE)
+
+    @property
+    def frequencies(self):
+        """The frequency for each step in the traces
+    
+        Returns:
+         numpy.ndarray: read-only array of frequencies (MHz)
+        """
+        if self.start_frequency is None:
+            return numpy.empty(0, dtype=FREQUENCY_TYPE)
+        return frequency_steps(self.start_frequency, self.step_frequency,
+                               self.steps)
+
+    def peaks(self, count=None, trace=None):
+        """Finds the strongest points in a trace
+    
+        Args:
+         count (int|None): the number of peaks to find (None means use peak_count)
+         trace (numpy.ndarray|None): amplitudes to search (None means the latest sweep)
+    
+        Returns:
+         list: :py:class:`Peak` tuples for the local maxima (largest amplitude first)
+        """
+        count = self.peak_count if count is None else count
+        trace = self.latest if trace is None else trace
+        if trace is None:
+            return []
+        padded = numpy.concatenate(([-numpy.inf], trace, [-numpy.inf]))
+        middle = padded[1:-1]
+        maxima = numpy.flatnonzero((middle > padded[:-2]) & (middle >= padded[2:]))
+        count = min(count, len(maxima))
+        if count < 1:
+            return []
+        top = maxima[numpy.argpartition(trace[maxima], -count)[-count:]]
+        top = top[numpy.argsort(trace[top])[::-1]]
+        frequency = self.frequencies
+        return [Peak(float(frequency[step]), float(trace[step]), int(step))
+                for step in top]
@@ -0,0 +1,278 @@
+# python standard library
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+import struct
+import threading
+import zlib
+
+# from pypi
+import numpy
+
+# this folder
+from sweep_arrays import amplitudes
+
+HEIGHT = 500
+LOW = -110
+HIGH = -30
+HOST = "127.0.0.1"
+LEVELS = 256
+COLORMAPS = {
+    "heat": ((0, 0, 0), (0, 0, 255), (0, 255, 255), (0, 255, 0),
+             (255, 255, 0), (255, 0, 0)),
+    "gray": ((0, 0, 0), (255, 255, 255)),
+}
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+TOLERANCE = 0.001
+
+@lru_cache(maxsize=16)
+def color_table(colormap="heat", low=LOW, high=HIGH):
+    """Builds the color for each amplitude level
+
+    Args:
+     colormap (str): key in COLORMAPS
+     low (float): amplitude (dBm) for the first color
+     high (float): amplitude (dBm) for the last color
+
+    Returns:
+     numpy.ndarray: read-only (256 x 3) array of RGB bytes
+    """
+    colors = numpy.array(COLORMAPS[colormap], dtype=numpy.float64)
+    points = numpy.linspace(0, 1, len(colors))
+    levels = numpy.arange(LEVELS) / -2
+    position = numpy.clip((levels - low) / (high - low), 0, 1)
+    table = numpy.column_stack([numpy.interp(position, points, colors[:, channel])
+                                for channel in range(3)])
+    table = numpy.rint(table).astype(numpy.uint8)
+    table.flags.writeable = False
+    return table
+
+def png_chunk(kind, data):
+    """Packs a PNG chunk
+
+    Args:
+     kind (bytes): the four-letter chunk type
+     data (bytes): the chunk's contents
+
+    Returns:
+     bytes: the chunk
+    """
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data)))
+
+def png(image, level=6):
+    """Encodes an image as a PNG
+
+    Args:
+     image (numpy.ndarray): (rows x columns x 3) array of RGB bytes
+     level (int): zlib compression level
+
+    Returns:
+     bytes: the PNG file
+    """
+    rows, columns = image.shape[:2]
+    scanlines = numpy.zeros((rows, 1 + 3 * columns), dtype=numpy.uint8)
+    scanlines[:, 1:] = image.reshape(rows, 3 * columns)
+    header = struct.pack(">IIBBBBB", columns, rows, 8, 2, 0, 0, 0)
+    return (PNG_SIGNATURE + png_chunk(b"IHDR", header)
+            + png_chunk(b"IDAT", zlib.compress(scanlines.tobytes(), level))
+            + png_chunk(b"IEND", b""))
+
+class Waterfall(object):
+    """An image of the most recent sweeps that's built one row at a time
+
+    Args:
+     height (int): the number of sweeps to show
+     low (float): amplitude (dBm) for the first color in the colormap
+     high (float): amplitude (dBm) for the last color in the colormap
+     colormap (str): key in COLORMAPS
+    """
+    def __init__(self, height=HEIGHT, low=LOW, high=HIGH, colormap="heat"):
+        self.height = height
+        self.colors = color_table(colormap, low, high)
+        self.steps = None
+        self.start_frequency = None
+        self.step_frequency = None
+        self.pixels = None
+        self.count = 0
+        self.position = 0
+        self.lock = threading.Lock()
+        return
+
+    @classmethod
+    def from_arguments(cls, arguments):
+        """Builds the waterfall from the command-line arguments
+    
+        Args:
+         arguments (argparse.Namespace): the parsed arguments
+    
+        Returns:
+         Waterfall: waterfall with the settings from the arguments
+        """
+        return cls(height=arguments.waterfall_height, low=arguments.waterfall_low,
+                   high=arguments.waterfall_high)
+
+    def allocate(self, steps):
+        """Creates a blank image for sweeps with the given number of steps
+    
+        Args:
+         steps (int): the number of steps in each sweep
+        """
+        self.steps = steps
+        self.pixels = numpy.zeros((2 * self.height, steps, 3), dtype=numpy.uint8)
+        self.count = 0
+        self.position = 0
+        return
+
+    def is_same_configuration(self, sweep):
+        """Checks if the sweep has the same frequencies as the ones in the image
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to check
+    
+        Returns:
+         bool: True if the sweep can be added to the image
+        """
+        return (sweep.TotalSteps == self.steps
+                and abs(sweep.StartFrequencyMHZ - self.start_frequency) < TOLERANCE
+                and abs(sweep.StepFrequencyMHZ - self.step_frequency) < TOLERANCE)
+
+    def append(self, sweep):
+        """Adds the sweep as the newest row
+    
+        Args:
+         sweep (:py:class:`RFExplorer.RFESweepData.RFESweepData`): the sweep to add
+        """
+        levels = numpy.clip(numpy.rint(amplitudes(sweep) * -2), 0, LEVELS - 1)
+        row = self.colors[levels.astype(numpy.intp)]
+        with self.lock:
+            if self.start_frequency is None or not self.is_same_configuration(sweep):
+                self.allocate(sweep.TotalSteps)
+                self.start_frequency = sweep.StartFrequencyMHZ
+                self.step_frequency = sweep.StepFrequencyMHZ
+            self.pixels[self.position] = row
+            self.pixels[self.position + self.height] = row
+            self.position = (self.position + 1) % self.height
+            self.count += 1
+        return
+
+    def extend(self, sweeps):
+        """Adds the sweeps in order
+    
+        Args:
+         sweeps (iterable): the :py:class:`RFExplorer.RFESweepData.RFESweepData` objects to add
+        """
+        for sweep in sweeps:
+            self.append(sweep)
+        return
+
+    def fill(self, acquisition, timeout=None):
+        """Adds the sweeps the RFECommunicator received since the last fill
+    
+        Args:
+         acquisition (:py:class:`acquisition.Acquisition`): waiter for the RFECommunicator
+         timeout (float|None): seconds to wait for a sweep (None means wait forever)
+    
+        Returns:
+         int: the number of sweeps added
+        """
+        sweeps = acquisition.new_sweeps(timeout)
+        self.extend(sweeps)
+        return len(sweeps)
+
+    def image(self):
+        """Copies the image of the most recent sweeps
+    
+        Returns:
+         numpy.ndarray: (sweeps x steps x 3) RGB bytes, newest sweep first
+        """
+        with self.lock:
+            if self.pixels is None:
+                return numpy.zeros((0, 0, 3), dtype=numpy.uint8)
+            stop = self.position + self.height
+            rows = min(self.count, self.height)
+            return self.pixels[stop - rows:stop][::-1].copy()
+
+    def snapshot(self):
+        """Encodes the image as a PNG
+    
+        Returns:
+         bytes: the PNG file
+        """
+        return png(self.image())
+
+    def save(self, path):
+        """Saves the image as a PNG
+    
+        Args:
+         path (str): where to save it
+        """
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as writer:
+            writer.write(self.snapshot())
+        os.replace(temporary, path)
+        return
+
+class WaterfallHandler(BaseHTTPRequestHandler):
+    """Serves the waterfall over HTTP"""
+    def do_GET(self):
+        """Sends the image"""
+        if self.path != "/waterfall.png":
+            self.send_error(404)
+            return
+        data = self.server.waterfall.snapshot()
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(data)
+        return
+
+    def log_message(self, format, *arguments):
+        """Doesn't log the requests"""
+        return
+
+def serve(waterfall, port, host=HOST):
+    """Serves the waterfall at http://<host>:<port>/waterfall.png
+
+    Args:
+     waterfall (Waterfall): the image to serve
+     port (int): the port to serve it on
+     host (str): the address to serve it on
+
+    Returns:
+     ThreadingHTTPServer: the running server
+    """
+    server = ThreadingHTTPServer((host, port), WaterfallHandler)
+    server.daemon_threads = True
+    server.waterfall = waterfall
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name="waterfall-http").start()
+    return server
+
+def add_arguments(parser):
+    """adds the waterfall arguments
+
+    Args:
+     parser (:py:class:`argparse.ArgumentParser`)
+
+    Returns:
+     :py:class:`argparse.ArgumentParser`: parser with the waterfall arguments
+    """
+    parser.add_argument(
+        "--waterfall-height", type=int, default=HEIGHT,
+        help="Number of sweeps in the waterfall (default=%(default)s)")
+    parser.add_argument(
+        "--waterfall-low", type=float, default=LOW,
+        help="Amplitude (dBm) for the bottom of the colors (default=%(default)s)")
+    parser.add_argument(
+        "--waterfall-high", type=float, default=HIGH,
+        help="Amplitude (dBm) for the top of the colors (default=%(default)s)")
+    parser.add_argument(
+        "--waterfall-port", type=int, default=None,
+        help="Serve the waterfall at http://{}:<port>/waterfall.png (default=%(default)s)".format(HOST))
+    parser.add_argument(
+        "--waterfall-file", default=None,
+        help="PNG file to save the waterfall in at the end (default=%(default)s)")
+    return parser